@@ -0,0 +1,192 @@
+"""
+Analysis Result Cache
+Bounded LRU + TTL cache for analyze_compatibility results keyed by content hash and model version
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+def normalize_text(text: str) -> str:
+    """Normalize text in ways that cannot change the analysis (all stages work on lowercased text)"""
+    return (text or '').replace('\r\n', '\n').strip().lower()
+
+def make_cache_key(resume: str, job_description: str, model_version: Optional[str]) -> str:
+    """Hash of the normalized inputs plus the model version that produced the result"""
+    digest = hashlib.sha256()
+    for part in (model_version or '', normalize_text(resume), normalize_text(job_description)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteCacheBackend:
+    """LRU cache in a local SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path: str, max_entries: int = 10000, touch_interval: float = 60):
+        self.path = path
+        self.max_entries = max_entries
+        # Hits refresh accessed_at (the LRU order) at most this often per entry, so most reads write nothing
+        self.touch_interval = touch_interval
+        self.local = threading.local()
+        self.writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_analysis_cache_accessed ON analysis_cache (accessed_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at, accessed_at FROM analysis_cache WHERE key = ?",
+                           (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        if now - row[2] >= self.touch_interval:
+            conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now)
+        )
+
+        # Sweep expired rows and trim to size periodically rather than on every write
+        self.writes += 1
+        if self.writes % 64 == 0:
+            conn.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,))
+            conn.execute("""
+                DELETE FROM analysis_cache WHERE key IN (
+                    SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        conn.commit()
+
+    def delete(self, key: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM analysis_cache")
+        conn.commit()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+class AnalysisCache:
+    """Result cache with hit/miss counters in front of a pluggable backend"""
+
+    def __init__(self, backend, ttl: float = 3600):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resume: str, job_description: str, model_version: Optional[str]) -> Optional[Dict]:
+        value = self.backend.get(make_cache_key(resume, job_description, model_version))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Stored serialized, so callers always get their own copy to mutate
+        return json.loads(value)
+
+    def set(self, resume: str, job_description: str, model_version: Optional[str], result: Dict):
+        self.backend.set(make_cache_key(resume, job_description, model_version), json.dumps(result), self.ttl)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the model has been retrained"""
+        self.backend.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def create_analysis_cache(backend: str = 'memory', max_entries: int = 1024, ttl: float = 3600,
+                          path: str = 'instance/analysis_cache.db') -> Optional[AnalysisCache]:
+    """Build the configured cache; backend is 'memory', 'sqlite' or 'none'"""
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return AnalysisCache(MemoryCacheBackend(max_entries), ttl)
+    if backend == 'sqlite':
+        return AnalysisCache(SQLiteCacheBackend(path, max_entries), ttl)
+    raise ValueError(f"Unknown analysis cache backend: {backend}")
@@ -84,20 +84,16 @@ def logout():
 
 @auth.route('/verify-email/<token>')
 def verify_email(token):
-    verification = EmailVerification.query.filter_by(token=token).first()
+    verification = EmailVerification.find_valid(token)
     
     if not verification:
-        flash('Invalid verification link.', 'error')
-        return redirect(url_for('auth.login'))
-    
-    if not verification.is_valid():
-        flash('Verification link has expired. Please request a new one.', 'error')
+        flash('Invalid or expired verification link. Please request a new one.', 'error')
         return redirect(url_for('auth.resend_verification'))
     
     # Verify the user
     user = verification.user
     user.is_verified = True
-    verification.is_used = True
+    EmailVerification.invalidate_for_users([user.id])
     
     db.session.commit()
     
@@ -151,9 +147,9 @@ def reset_password(token):
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
-    reset_token = PasswordReset.query.filter_by(token=token).first()
+    reset_token = PasswordReset.find_valid(token)
     
-    if not reset_token or not reset_token.is_valid():
+    if not reset_token:
         flash('Invalid or expired reset link. Please request a new one.', 'error')
         return redirect(url_for('auth.forgot_password'))
     
@@ -161,7 +157,7 @@ def reset_password(token):
     if form.validate_on_submit():
         user = reset_token.user
         user.set_password(form.password.data)
-        reset_token.is_used = True
+        PasswordReset.invalidate_for_users([user.id])
         
         db.session.commit()
         
@@ -0,0 +1,198 @@
+"""
+ML Engine Benchmarks
+Measures throughput and latency percentiles of the ResumeAnalyzer hot paths on synthetic documents,
+and fails when a stage regresses past a threshold against a saved baseline.
+
+Usage:
+    python benchmarks/bench_ml_engine.py --save-baseline           # record benchmarks/baseline.json
+    python benchmarks/bench_ml_engine.py --threshold 0.25          # compare against it
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_engine import ResumeAnalyzer
+from skill_matcher import SKILL_CATEGORIES
+from experience_extractor import EXPERIENCE_EXTRACTOR
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_SIZES = [100, 500, 2000]  # words per document
+
+FILLER = (
+    'built designed delivered maintained scalable reliable services platform team collaborated '
+    'stakeholders production systems customers product features performance improved reduced latency '
+    'mentored engineers reviewed code architecture migration ownership roadmap requirements responsibilities'
+).split()
+LEVEL_PHRASES = ['senior', 'junior', 'mid-level', 'lead', 'entry level', 'intermediate']
+
+def synthesize_document(rng: random.Random, words: int) -> str:
+    """Resume/job-like text drawn from the skill catalog plus filler vocabulary"""
+    skills = [skill for category_skills in SKILL_CATEGORIES.values() for skill in category_skills]
+    parts = [f"{rng.choice(LEVEL_PHRASES)} engineer with {rng.randint(1, 12)}+ years of experience"]
+    count = len(parts[0].split())
+    while count < words:
+        if rng.random() < 0.25:
+            phrase = rng.choice(skills)
+        else:
+            phrase = ' '.join(rng.choice(FILLER) for _ in range(rng.randint(3, 8)))
+        parts.append(phrase)
+        count += len(phrase.split())
+    return ', '.join(parts) + '.'
+
+def synthesize_training_data(rng: random.Random, examples: int) -> List[Tuple[str, str, str]]:
+    return [
+        (synthesize_document(rng, 120), synthesize_document(rng, 200), rng.choice(['high', 'medium', 'low']))
+        for _ in range(examples)
+    ]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(fn: Callable, inputs: List, min_seconds: float, max_iterations: int) -> Dict:
+    """Call fn over the inputs round-robin, recording per-call latency"""
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iterations and (time.perf_counter() - started < min_seconds or len(latencies) < 10):
+        args = inputs[len(latencies) % len(inputs)]
+        call_started = time.perf_counter_ns()
+        fn(*args)
+        latencies.append((time.perf_counter_ns() - call_started) / 1e6)
+    total_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'iterations': len(latencies),
+        'throughput_per_sec': round(len(latencies) / total_seconds, 2),
+        'p50_ms': round(percentile(latencies, 0.50), 4),
+        'p95_ms': round(percentile(latencies, 0.95), 4),
+        'p99_ms': round(percentile(latencies, 0.99), 4)
+    }
+
+def bench_training(rng: random.Random, examples: int) -> Dict:
+    data = synthesize_training_data(rng, examples)
+    analyzer = ResumeAnalyzer(train=False)
+    tracemalloc.start()
+    started = time.perf_counter()
+    analyzer.train_model(data)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'examples': examples,
+        'seconds': round(seconds, 4),
+        'peak_memory_mb': round(peak / (1024 * 1024), 3),
+        'analyzer': analyzer
+    }
+
+def run_benchmarks(sizes: List[int], training_examples: int, min_seconds: float,
+                   max_iterations: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    training = bench_training(rng, training_examples)
+    analyzer = training.pop('analyzer')
+
+    stages = {}
+    for size in sizes:
+        pairs = [(synthesize_document(rng, size), synthesize_document(rng, size)) for _ in range(8)]
+        docs = [(resume,) for resume, _ in pairs]
+        parsed_pairs = [(analyzer.parse(resume), analyzer.parse(job)) for resume, job in pairs]
+        # One job description ranked against a pool of 100 parsed resumes
+        pool = [analyzer.parse(synthesize_document(rng, size)) for _ in range(100)]
+        pools = [(pool, job) for _, job in parsed_pairs]
+
+        stage_fns = {
+            'preprocess_text': (analyzer.preprocess_text, docs),
+            'parse': (analyzer.parse, docs),
+            'extract_skills': (analyzer.extract_skills, docs),
+            'extract_experience_level': (analyzer.extract_experience_level, docs),
+            'extract_experience_profile': (EXPERIENCE_EXTRACTOR.extract, docs),
+            'calculate_jaccard_similarity': (analyzer.calculate_jaccard_similarity, parsed_pairs),
+            'predict_compatibility_class': (analyzer.predict_compatibility_class, parsed_pairs),
+            'generate_recommendations': (analyzer.generate_recommendations, parsed_pairs),
+            'analyze_compatibility': (analyzer.analyze_compatibility, pairs),
+            'analyze_many_x100': (lambda resumes, job: analyzer.analyze_many(resumes, job, top_k=10), pools)
+        }
+        for name, (fn, inputs) in stage_fns.items():
+            stages[f"{name}@{size}"] = measure(fn, inputs, min_seconds, max_iterations)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'sizes': sizes,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'train_model': training,
+        'stages': stages
+    }
+
+def find_regressions(results: Dict, baseline: Dict, metric: str, threshold: float) -> List[str]:
+    """Stages (and training) that got slower than baseline by more than threshold"""
+    regressions = []
+    for name, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if previous and previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+            regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]} ms")
+
+    previous_training = baseline.get('train_model')
+    if previous_training and previous_training['examples'] == results['train_model']['examples']:
+        for key in ('seconds', 'peak_memory_mb'):
+            if results['train_model'][key] > previous_training[key] * (1 + threshold):
+                regressions.append(f"train_model: {key} {previous_training[key]} -> {results['train_model'][key]}")
+    return regressions
+
+def print_report(results: Dict):
+    training = results['train_model']
+    print(f"train_model: {training['examples']} examples in {training['seconds']}s, "
+          f"peak {training['peak_memory_mb']} MB")
+    print(f"{'stage':<42}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results['stages'].items():
+        print(f"{name:<42}{stats['throughput_per_sec']:>12}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ml_engine hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="document sizes in words")
+    parser.add_argument('--training-examples', type=int, default=2000)
+    parser.add_argument('--min-seconds', type=float, default=0.5, help="minimum time spent per stage")
+    parser.add_argument('--max-iterations', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="also write results JSON to this path")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="overwrite the baseline with this run")
+    parser.add_argument('--metric', choices=['p50_ms', 'p95_ms', 'p99_ms'], default='p95_ms')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.training_examples, args.min_seconds, args.max_iterations, args.seed)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.metric, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
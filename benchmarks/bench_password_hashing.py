@@ -0,0 +1,74 @@
+"""
+Password Hashing Benchmarks
+Reports logins/sec per core (one password verification per login) for each hash scheme and cost,
+to pick PASSWORD_HASH_SCHEME / PASSWORD_HASH_COST against login capacity.
+
+Usage:
+    python benchmarks/bench_password_hashing.py
+    python benchmarks/bench_password_hashing.py --scheme bcrypt --costs 10 11 12 --seconds 2
+"""
+
+import os
+import sys
+import time
+import argparse
+import platform
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_hashing import DEFAULT_COSTS, PasswordHasher
+
+DEFAULT_SETTINGS = {
+    'pbkdf2': [260000, 600000, 1000000],
+    'scrypt': [16384, 32768, 65536],
+    'bcrypt': [10, 11, 12, 13]
+}
+
+def bench_setting(scheme: str, cost: int, min_seconds: float, min_iterations: int = 3) -> Dict:
+    """Time password verification, which is what a login pays, on a single core"""
+    hasher = PasswordHasher(scheme, cost)
+    password = 'correct horse battery staple'
+    password_hash = hasher.hash(password)
+
+    iterations = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < min_seconds or iterations < min_iterations:
+        if not hasher.verify(password_hash, password):
+            raise Exception(f"{scheme}:{cost} failed to verify its own hash")
+        iterations += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'scheme': scheme,
+        'cost': cost,
+        'ms_per_login': round(elapsed / iterations * 1000, 2),
+        'logins_per_sec_per_core': round(iterations / elapsed, 1)
+    }
+
+def run(settings: Dict[str, List[int]], min_seconds: float) -> List[Dict]:
+    results = []
+    for scheme, costs in settings.items():
+        for cost in costs:
+            result = bench_setting(scheme, cost, min_seconds)
+            default = '  (default)' if cost == DEFAULT_COSTS[scheme] else ''
+            print(f"{scheme:<7} cost={cost:<8} {result['ms_per_login']:>9.2f} ms/login "
+                  f"{result['logins_per_sec_per_core']:>9.1f} logins/sec/core{default}")
+            results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark password hash verification per scheme and cost")
+    parser.add_argument('--scheme', choices=sorted(DEFAULT_COSTS), help="only this scheme (default: all)")
+    parser.add_argument('--costs', type=int, nargs='+', help="costs to try for --scheme")
+    parser.add_argument('--seconds', type=float, default=1.0, help="minimum time per setting")
+    args = parser.parse_args()
+
+    if args.costs and not args.scheme:
+        parser.error('--costs needs --scheme')
+    settings = DEFAULT_SETTINGS
+    if args.scheme:
+        settings = {args.scheme: args.costs or DEFAULT_SETTINGS[args.scheme]}
+
+    print(f"Python {platform.python_version()} on {platform.machine()}, 1 core")
+    run(settings, args.seconds)
@@ -0,0 +1,51 @@
+"""
+Offline Model Builder
+Trains the ResumeAnalyzer once and writes the artifact that web workers load at startup
+"""
+
+import argparse
+import time
+from typing import Optional
+from ml_engine import ResumeAnalyzer
+from training_data import COLLECTED_TRAINING_DATA_PATH, TrainingDataStream
+
+DEFAULT_MODEL_PATH = 'instance/model'
+
+def build_model(output_path: str, training_data_path: Optional[str] = None) -> ResumeAnalyzer:
+    """Train on the given (or default) dataset and save the artifact to output_path"""
+    started = time.perf_counter()
+    analyzer = ResumeAnalyzer(train=False)
+    analyzer.train_model(TrainingDataStream(training_data_path) if training_data_path else None)
+    analyzer.save(output_path)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Saved model {analyzer.model_version} ({len(analyzer.vocabulary)} tokens, "
+          f"{len(analyzer.classes)} classes) to {output_path} in {elapsed:.1f}s")
+    return analyzer
+
+def update_model(model_path: str, examples_path: str) -> ResumeAnalyzer:
+    """Fold newly collected examples into an existing artifact without a full retrain"""
+    started = time.perf_counter()
+    analyzer = ResumeAnalyzer.load(model_path)
+    analyzer.partial_fit(TrainingDataStream(examples_path))
+    analyzer.save(model_path)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Added {examples_path}; saved model {analyzer.model_version} "
+          f"({len(analyzer.vocabulary)} tokens) to {model_path} in {elapsed:.1f}s")
+    return analyzer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the ResumeAnalyzer model artifact")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH,
+                        help=f"artifact directory (default: {DEFAULT_MODEL_PATH})")
+    parser.add_argument('--training-data', help="training file to build from (default: the bundled corpus)")
+    parser.add_argument('--update', nargs='?', const=COLLECTED_TRAINING_DATA_PATH, metavar='PATH',
+                        help=f"incrementally add examples from PATH (default: {COLLECTED_TRAINING_DATA_PATH}) "
+                             "to the existing artifact")
+    args = parser.parse_args()
+    
+    if args.update:
+        update_model(args.output, args.update)
+    else:
+        build_model(args.output, args.training_data)
@@ -0,0 +1,169 @@
+"""
+Candidate Retrieval Index
+Inverted index over each user's stored resumes that shortlists the best candidates for a job description
+with BM25 plus skill overlap, so full Naive Bayes scoring only runs on the shortlist
+"""
+
+import math
+import hashlib
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from models import db, AnalysisHistory, StoredDocument
+
+class _OwnerIndex:
+    """One user's resumes: BM25 postings over analyzer tokens plus a skill -> resumes index"""
+
+    def __init__(self):
+        self.terms = {}               # token -> term id
+        self.postings = []            # term id -> (doc ids, term frequencies)
+        self.skill_postings = {}      # skill -> doc ids
+        self.doc_keys = []            # doc id -> AnalysisHistory id
+        self.doc_lengths = array('f')
+        self.total_length = 0
+        self.seen = {}                # content hash -> doc id
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+class CandidateIndex:
+    """Per-user candidate indexes, one entry per distinct resume, built on a user's first match request
+
+    Entries are keyed by the newest AnalysisHistory id holding that resume. Syncing and scoring only ever
+    touch the requesting user's rows, so a request costs the same however many users there are; indexes
+    of the `max_owners` most recently matched users are kept in memory.
+    """
+
+    def __init__(self, analyzer, k1: float = 1.2, b: float = 0.75, skill_weight: float = 1.0,
+                 max_owners: int = 1024):
+        self.analyzer = analyzer
+        self.k1 = k1
+        self.b = b
+        self.skill_weight = skill_weight
+        self.max_owners = max_owners
+        self.owners = OrderedDict()   # user id -> _OwnerIndex, least recently used first
+        self.lock = threading.Lock()
+
+    def _owner_index(self, owner: int) -> _OwnerIndex:
+        with self.lock:
+            index = self.owners.get(owner)
+            if index is None:
+                index = self.owners[owner] = _OwnerIndex()
+            self.owners.move_to_end(owner)
+            while len(self.owners) > self.max_owners:
+                self.owners.popitem(last=False)
+            return index
+
+    def _features(self, text: str) -> Tuple[List[str], List[str]]:
+        # Tokenization and skill matching only; the full parse (and the feature store) is not needed here
+        lower_text = text.lower()
+        matcher = self.analyzer.skill_matcher
+        return self.analyzer._tokenize_lowered(lower_text), matcher.skills(matcher.find(lower_text))
+
+    def add(self, key: int, owner: int, text: str):
+        """Index a resume; a resume the owner already has only moves its key to the newer row"""
+        index = self._owner_index(owner)
+        with index.lock:
+            self._add(index, key, text)
+
+    def _add(self, index: _OwnerIndex, key: int, text: str):
+        content_hash = hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+        doc = index.seen.get(content_hash)
+        if doc is not None:
+            index.doc_keys[doc] = max(index.doc_keys[doc], key)
+            return
+
+        tokens, skills = self._features(text)
+        doc = len(index.doc_keys)
+        index.seen[content_hash] = doc
+        index.doc_keys.append(key)
+        index.doc_lengths.append(len(tokens))
+        index.total_length += len(tokens)
+
+        for token, count in Counter(tokens).items():
+            term = index.terms.get(token)
+            if term is None:
+                term = index.terms[token] = len(index.postings)
+                index.postings.append((array('i'), array('f')))
+            docs, frequencies = index.postings[term]
+            docs.append(doc)
+            frequencies.append(count)
+        for skill in skills:
+            index.skill_postings.setdefault(skill, array('i')).append(doc)
+
+    def sync_from_history(self, owner: int, batch_size: int = 1000) -> int:
+        """Index the user's AnalysisHistory rows added since their last sync; returns how many were read"""
+        index = self._owner_index(owner)
+        added = 0
+        with index.lock:
+            while True:
+                rows = db.session.query(AnalysisHistory.id, AnalysisHistory.resume_document_id)\
+                                 .filter(AnalysisHistory.user_id == owner, AnalysisHistory.id > index.last_id)\
+                                 .order_by(AnalysisHistory.id).limit(batch_size).all()
+                if not rows:
+                    return added
+                texts = self._resume_texts(rows)
+                for history_id, document_id in rows:
+                    self._add(index, history_id, texts[document_id] if document_id else self._legacy_text(history_id))
+                index.last_id = rows[-1][0]
+                added += len(rows)
+
+    @staticmethod
+    def _resume_texts(rows) -> Dict[int, str]:
+        # Each distinct stored resume is read and decompressed once per batch, however many rows share it
+        document_ids = {document_id for _, document_id in rows if document_id}
+        if not document_ids:
+            return {}
+        documents = StoredDocument.query.filter(StoredDocument.id.in_(document_ids))
+        return {document.id: document.text for document in documents}
+
+    @staticmethod
+    def _legacy_text(history_id: int) -> str:
+        # Rows migrate_history_storage.py has not reached yet still hold their text inline
+        return db.session.get(AnalysisHistory, history_id).resume_text
+
+    def search(self, owner: int, job_description: str, limit: int = 100) -> List[Tuple[int, float]]:
+        """Top `limit` (history id, retrieval score) pairs among the user's resumes, best first"""
+        tokens, skills = self._features(job_description)
+        index = self._owner_index(owner)
+
+        with index.lock:
+            count = len(index.doc_keys)
+            if not count:
+                return []
+
+            lengths = np.array(index.doc_lengths, dtype=np.float32)
+            average_length = index.total_length / count or 1.0
+            length_norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            scores = np.zeros(count, dtype=np.float32)
+
+            for token in set(tokens):
+                term = index.terms.get(token)
+                if term is None:
+                    continue
+                docs, frequencies = index.postings[term]
+                docs = np.array(docs, dtype=np.int32)
+                frequencies = np.array(frequencies, dtype=np.float32)
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + length_norm[docs])
+
+            for skill in skills:
+                docs = index.skill_postings.get(skill)
+                if docs is not None:
+                    scores[np.array(docs, dtype=np.int32)] += self.skill_weight
+
+            matching = np.flatnonzero(scores > 0)
+            if len(matching) > limit:
+                matching = matching[np.argpartition(-scores[matching], limit - 1)[:limit]]
+            ranked = matching[np.argsort(-scores[matching], kind='stable')]
+            return [(index.doc_keys[doc], float(scores[doc])) for doc in ranked]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            indexes = list(self.owners.values())
+        return {
+            'users': len(indexes),
+            'resumes': sum(len(index.doc_keys) for index in indexes),
+            'terms': sum(len(index.terms) for index in indexes)
+        }
@@ -4,92 +4,106 @@ Fetches authentic job descriptions from various sources to expand training data
 """
 
 import trafilatura
-import requests
-import json
-import time
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import logging
+import argparse
+from fetch_pipeline import FetchPipeline
+from page_cache import DEFAULT_PAGE_CACHE_PATH, PageCache
+from near_duplicates import DEFAULT_SIGNATURE_INDEX_PATH, NearDuplicateIndex
+from skill_matcher import SKILL_MATCHER
+from experience_extractor import POSTING_EXPERIENCE_EXTRACTOR
+from training_data import COLLECTED_TRAINING_DATA_PATH, write_training_data
+
+# Bump when content extraction changes so cached extracted text is redone
+CONTENT_EXTRACTION_VERSION = 1
 
 class TechJobDataCollector:
     """Collect real tech job data from various sources"""
     
-    def __init__(self):
+    # Job board pages fetched for each source
+    SOURCES = {
+        'stackoverflow': [
+            "https://stackoverflow.com/jobs?q=python+developer",
+            "https://stackoverflow.com/jobs?q=javascript+developer", 
+            "https://stackoverflow.com/jobs?q=data+scientist",
+            "https://stackoverflow.com/jobs?q=devops+engineer",
+            "https://stackoverflow.com/jobs?q=machine+learning+engineer"
+        ],
+        'github': ["https://github.com/careers"],
+        'ycombinator': ["https://www.ycombinator.com/jobs"]
+    }
+    
+    def __init__(self, fetcher: Optional[FetchPipeline] = None, page_cache: Optional[PageCache] = None,
+                 offline: bool = False, dedup_index: Optional[NearDuplicateIndex] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.collected_jobs = []
+        # Concurrent, per-host rate-limited fetching (replaces a fixed sleep after every request)
+        self.fetcher = fetcher or FetchPipeline(headers=self.headers, cache=page_cache, offline=offline)
+        # Extracted text is cached per page body, so only pages that changed are re-extracted
+        self.page_cache = page_cache if page_cache is not None else self.fetcher.cache
+        # Without a persistent index, duplicates are still dropped within a run
+        self.dedup_index = dedup_index if dedup_index is not None else NearDuplicateIndex(path=None)
+        self.duplicates_skipped = 0
         
     def fetch_job_content(self, url: str) -> str:
         """Fetch and extract clean text content from job posting URL"""
         try:
-            downloaded = trafilatura.fetch_url(url)
-            if downloaded:
-                text = trafilatura.extract(downloaded)
-                return text if text else ""
-            return ""
+            downloaded = self.fetcher.fetch(url)
+            return self._extract_content(url, downloaded) if downloaded else ""
         except Exception as e:
             logging.error(f"Error fetching {url}: {e}")
             return ""
     
+    def _extract_content(self, url: str, downloaded: str) -> str:
+        """Extract clean text from a downloaded page"""
+        if self.page_cache is not None:
+            cached_text = self.page_cache.get_text(downloaded, CONTENT_EXTRACTION_VERSION)
+            if cached_text is not None:
+                return cached_text
+        
+        text = trafilatura.extract(downloaded) or ""
+        if self.page_cache is not None:
+            self.page_cache.set_text(downloaded, text, CONTENT_EXTRACTION_VERSION)
+        return text
+    
+    def _collect_page(self, url: str, downloaded: str) -> List[Dict]:
+        """Extraction and parsing stage, run in the fetch worker as soon as the page arrives"""
+        content = self._extract_content(url, downloaded)
+        return self._extract_job_sections(content) if content else []
+    
+    def collect_jobs(self, urls: List[str]) -> List[Dict]:
+        """Fetch and parse job pages concurrently"""
+        jobs = []
+        for url, job_sections in self.fetcher.map(urls, self._collect_page):
+            jobs.extend(job_sections)
+        return jobs
+    
     def collect_stackoverflow_jobs(self) -> List[Dict]:
         """Collect job data from Stack Overflow careers page"""
-        jobs = []
         try:
-            # Stack Overflow job search URLs for different roles
-            search_urls = [
-                "https://stackoverflow.com/jobs?q=python+developer",
-                "https://stackoverflow.com/jobs?q=javascript+developer", 
-                "https://stackoverflow.com/jobs?q=data+scientist",
-                "https://stackoverflow.com/jobs?q=devops+engineer",
-                "https://stackoverflow.com/jobs?q=machine+learning+engineer"
-            ]
-            
-            for url in search_urls:
-                content = self.fetch_job_content(url)
-                if content:
-                    # Extract job descriptions from the content
-                    job_sections = self._extract_job_sections(content)
-                    jobs.extend(job_sections)
-                    
-                time.sleep(2)  # Rate limiting
-                
+            return self.collect_jobs(self.SOURCES['stackoverflow'])
         except Exception as e:
             logging.error(f"Error collecting Stack Overflow jobs: {e}")
-            
-        return jobs
+            return []
     
     def collect_github_jobs(self) -> List[Dict]:
         """Collect job data from GitHub careers"""
-        jobs = []
         try:
-            github_careers_url = "https://github.com/careers"
-            content = self.fetch_job_content(github_careers_url)
-            
-            if content:
-                job_sections = self._extract_job_sections(content)
-                jobs.extend(job_sections)
-                
+            return self.collect_jobs(self.SOURCES['github'])
         except Exception as e:
             logging.error(f"Error collecting GitHub jobs: {e}")
-            
-        return jobs
+            return []
     
     def collect_ycombinator_jobs(self) -> List[Dict]:
         """Collect job data from Y Combinator job board"""
-        jobs = []
         try:
-            yc_jobs_url = "https://www.ycombinator.com/jobs"
-            content = self.fetch_job_content(yc_jobs_url)
-            
-            if content:
-                job_sections = self._extract_job_sections(content)
-                jobs.extend(job_sections)
-                
+            return self.collect_jobs(self.SOURCES['ycombinator'])
         except Exception as e:
             logging.error(f"Error collecting Y Combinator jobs: {e}")
-            
-        return jobs
+            return []
     
     def _extract_job_sections(self, content: str) -> List[Dict]:
         """Extract individual job descriptions from page content"""
@@ -106,6 +120,12 @@ class TechJobDataCollector:
                     
         return jobs
     
+    def _deduplicate(self, jobs: List[Dict]) -> List[Dict]:
+        """Drop jobs that near-duplicate one already collected, so each posting yields one set of examples"""
+        new_jobs = self.dedup_index.filter_new(jobs)
+        self.duplicates_skipped += len(jobs) - len(new_jobs)
+        return new_jobs
+    
     def _is_job_description(self, text: str) -> bool:
         """Check if text section is likely a job description"""
         job_indicators = [
@@ -127,9 +147,8 @@ class TechJobDataCollector:
             lines = text.strip().split('\n')
             title = self._extract_job_title(text)
             
-            # Determine experience level and role type
-            experience_level = self._extract_experience_level(text)
-            role_type = self._extract_role_type(text)
+            # Determine experience level and role type in one pass of the shared extractor
+            profile = POSTING_EXPERIENCE_EXTRACTOR.extract(text)
             
             # Extract skills
             skills = self._extract_skills_from_text(text)
@@ -137,8 +156,8 @@ class TechJobDataCollector:
             return {
                 'title': title,
                 'description': text.strip(),
-                'experience_level': experience_level,
-                'role_type': role_type,
+                'experience_level': profile.level,
+                'role_type': profile.role,
                 'skills': skills,
                 'length': len(text)
             }
@@ -169,149 +188,17 @@ class TechJobDataCollector:
     
     def _extract_experience_level(self, text: str) -> str:
         """Extract experience level from job description"""
-        text_lower = text.lower()
-        
-        if any(term in text_lower for term in ['senior', 'lead', 'principal', 'staff', '5+ years', '6+ years', '7+ years', '8+ years']):
-            return 'senior'
-        elif any(term in text_lower for term in ['junior', 'entry level', 'graduate', '0-2 years', '1-3 years']):
-            return 'junior'
-        else:
-            return 'mid'
+        return POSTING_EXPERIENCE_EXTRACTOR.level(text.lower())
     
     def _extract_role_type(self, text: str) -> str:
         """Extract primary role type from job description"""
-        text_lower = text.lower()
-        
-        role_keywords = {
-            'data_science': ['data scientist', 'machine learning', 'ml engineer', 'data analyst', 'statistician'],
-            'backend': ['backend', 'server-side', 'api development', 'microservices', 'database'],
-            'frontend': ['frontend', 'react', 'vue', 'angular', 'ui/ux', 'javascript'],
-            'fullstack': ['full stack', 'fullstack', 'full-stack'],
-            'devops': ['devops', 'site reliability', 'platform engineer', 'infrastructure'],
-            'mobile': ['ios', 'android', 'mobile', 'swift', 'kotlin', 'react native'],
-            'security': ['security', 'cybersecurity', 'penetration testing'],
-            'cloud': ['cloud architect', 'aws', 'azure', 'gcp', 'cloud engineer']
-        }
-        
-        for role_type, keywords in role_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return role_type
-                
-        return 'general'
+        return POSTING_EXPERIENCE_EXTRACTOR.role(text.lower())
     
     def _extract_skills_from_text(self, text: str) -> List[str]:
         """Extract technical skills from job description with comprehensive patterns"""
-        text_lower = text.lower()
-
-        # Massively expanded skill list covering all major tech domains
-        tech_skills = {
-            # Programming Languages
-            'python', 'java', 'javascript', 'typescript', 'go', 'rust', 'c++', 'c#', 'c', 
-            'swift', 'kotlin', 'scala', 'ruby', 'php', 'perl', 'r', 'matlab', 'objective-c',
-            'dart', 'solidity', 'elixir', 'erlang', 'haskell', 'clojure', 'f#', 'vb.net',
-
-            # Web Frameworks
-            'react', 'vue', 'angular', 'django', 'flask', 'fastapi', 'spring', 'spring boot',
-            'express', 'nestjs', 'next.js', 'nuxt', 'gatsby', 'svelte', 'ember', 'backbone',
-            'laravel', 'symfony', 'codeigniter', 'rails', 'sinatra', 'asp.net', 'blazor',
-
-            # Mobile Development
-            'react native', 'flutter', 'xamarin', 'ionic', 'cordova', 'phonegap', 'unity',
-            'cocos2d', 'unreal engine', 'android studio', 'xcode', 'swiftui', 'jetpack compose',
-
-            # Cloud Platforms
-            'aws', 'azure', 'gcp', 'alibaba cloud', 'oracle cloud', 'digitalocean', 'heroku',
-            'vercel', 'netlify', 'firebase', 'supabase', 'cloudflare', 'linode', 'vultr',
-
-            # AWS Services
-            'ec2', 's3', 'lambda', 'rds', 'dynamodb', 'cloudfront', 'route53', 'vpc',
-            'iam', 'cloudformation', 'cloudwatch', 'sns', 'sqs', 'kinesis', 'redshift',
-            'eks', 'ecs', 'fargate', 'api gateway', 'cognito', 'secrets manager',
-
-            # Azure Services
-            'azure functions', 'azure sql', 'cosmos db', 'azure storage', 'azure ad',
-            'azure devops', 'azure kubernetes service', 'azure container instances',
-
-            # DevOps & Infrastructure
-            'docker', 'kubernetes', 'terraform', 'ansible', 'puppet', 'chef', 'vagrant',
-            'helm', 'istio', 'envoy', 'consul', 'vault', 'nomad', 'packer', 'jenkins',
-            'gitlab ci', 'github actions', 'circleci', 'travis ci', 'bamboo', 'teamcity',
-            'argocd', 'flux', 'tekton', 'spinnaker',
-
-            # Databases
-            'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch', 'sqlite', 'oracle',
-            'sql server', 'mariadb', 'cassandra', 'neo4j', 'influxdb', 'clickhouse',
-            'dynamodb', 'firestore', 'couchdb', 'rethinkdb', 'arangodb', 'snowflake',
-            'bigquery', 'redshift', 'databricks', 'cockroachdb', 'planetscale',
-
-            # Data Science & ML
-            'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 'numpy', 'scipy',
-            'matplotlib', 'seaborn', 'plotly', 'jupyter', 'anaconda', 'mlflow', 'kubeflow',
-            'airflow', 'prefect', 'dask', 'ray', 'spark', 'hadoop', 'hive', 'pig',
-            'kafka', 'pulsar', 'storm', 'flink', 'beam', 'nifi',
-
-            # Frontend Technologies
-            'html', 'css', 'sass', 'less', 'stylus', 'bootstrap', 'tailwind', 'bulma',
-            'material-ui', 'ant design', 'chakra ui', 'semantic ui', 'foundation',
-            'webpack', 'vite', 'rollup', 'parcel', 'gulp', 'grunt', 'babel', 'eslint',
-            'prettier', 'styled-components', 'emotion', 'redux', 'mobx', 'zustand',
-
-            # Testing Frameworks
-            'jest', 'mocha', 'chai', 'jasmine', 'karma', 'protractor', 'cypress', 'playwright',
-            'selenium', 'webdriver', 'puppeteer', 'junit', 'testng', 'mockito', 'pytest',
-            'unittest', 'nose', 'tox', 'coverage', 'codecov', 'sonarqube',
-
-            # Monitoring & Observability
-            'prometheus', 'grafana', 'datadog', 'new relic', 'dynatrace', 'splunk',
-            'elk stack', 'logstash', 'kibana', 'fluentd', 'jaeger', 'zipkin', 'opentelemetry',
-            'sentry', 'rollbar', 'bugsnag', 'pagerduty', 'opsgenie', 'pingdom',
-
-            # Security Tools
-            'owasp', 'nessus', 'burp suite', 'metasploit', 'nmap', 'wireshark', 'snort',
-            'ossec', 'fail2ban', 'iptables', 'firewalld', 'selinux', 'apparmor',
-
-            # API Technologies
-            'rest', 'graphql', 'grpc', 'soap', 'websockets', 'webhooks', 'openapi',
-            'swagger', 'postman', 'insomnia', 'apollo', 'relay', 'hasura', 'prisma',
-
-            # Version Control
-            'git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'perforce',
-            'git flow', 'github flow', 'trunk-based development',
-
-            # Operating Systems
-            'linux', 'ubuntu', 'centos', 'rhel', 'debian', 'alpine', 'windows', 'macos',
-            'unix', 'bash', 'zsh', 'powershell', 'cmd', 'shell scripting',
-
-            # Methodologies
-            'agile', 'scrum', 'kanban', 'lean', 'devops', 'tdd', 'bdd', 'ddd', 'microservices',
-            'monolith', 'event-driven', 'cqrs', 'event sourcing', 'clean architecture',
-            'hexagonal architecture', 'mvc', 'mvp', 'mvvm', 'solid principles',
-
-            # Blockchain & Crypto
-            'blockchain', 'bitcoin', 'ethereum', 'smart contracts', 'defi', 'nft',
-            'web3', 'metamask', 'truffle', 'hardhat', 'ganache', 'ipfs',
-
-            # Game Development
-            'unity', 'unreal engine', 'godot', 'cocos2d', 'phaser', 'three.js', 'webgl',
-            'opengl', 'directx', 'vulkan', 'metal', 'hlsl', 'glsl',
-
-            # IoT & Embedded
-            'arduino', 'raspberry pi', 'esp32', 'mqtt', 'coap', 'zigbee', 'bluetooth',
-            'wifi', 'lora', 'sigfox', 'nb-iot', 'rtos', 'freertos', 'zephyr',
-
-            # Analytics & BI
-            'tableau', 'power bi', 'looker', 'qlik', 'spotfire', 'superset', 'metabase',
-            'google analytics', 'adobe analytics', 'mixpanel', 'amplitude', 'segment'
-        }
-
-        found_skills = []
-        for skill in tech_skills:
-            # Use word boundaries to avoid partial matches
-            pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found_skills.append(skill)
-
-        return found_skills
+        # One pass of the shared compiled matcher instead of a regex per skill; postings list languages
+        # like Go, R and C by name, so short skills are kept here
+        return SKILL_MATCHER.skills(SKILL_MATCHER.find(text.lower(), include_short=True))
     
     def generate_training_examples(self, collected_jobs: List[Dict]) -> List[Tuple[str, str, str]]:
         """Generate training examples from collected job data"""
@@ -406,38 +293,53 @@ class TechJobDataCollector:
         """Run complete data collection process"""
         print("Starting real-world tech job data collection...")
         
-        all_jobs = []
-        
-        # Collect from various sources
-        print("Collecting Stack Overflow jobs...")
-        all_jobs.extend(self.collect_stackoverflow_jobs())
-        
-        print("Collecting GitHub jobs...")
-        all_jobs.extend(self.collect_github_jobs())
-        
-        print("Collecting Y Combinator jobs...")
-        all_jobs.extend(self.collect_ycombinator_jobs())
-        
-        print(f"Collected {len(all_jobs)} job descriptions")
-        
-        # Generate training examples
-        print("Generating training examples...")
-        training_examples = self.generate_training_examples(all_jobs)
+        # All sources go through one pipeline, so hosts are fetched in parallel and the run
+        # takes about as long as the slowest host; examples are generated as pages complete
+        urls = [url for source_urls in self.SOURCES.values() for url in source_urls]
+        print(f"Fetching {len(urls)} pages from {len(self.SOURCES)} sources...")
         
+        all_jobs = []
+        training_examples = []
+        for url, jobs in self.fetcher.map(urls, self._collect_page):
+            jobs = self._deduplicate(jobs)
+            all_jobs.extend(jobs)
+            training_examples.extend(self.generate_training_examples(jobs))
+        
+        counts = self.fetcher.counts
+        print(f"Pages: {counts['downloaded']} downloaded, {counts['not_modified']} not modified, "
+              f"{counts['cached']} served from cache")
+        if self.page_cache is not None:
+            print(f"Re-extracted {self.page_cache.text_misses} changed pages")
+        print(f"Collected {len(all_jobs)} job descriptions ({self.duplicates_skipped} near-duplicates skipped)")
         print(f"Generated {len(training_examples)} training examples")
         
         return training_examples
 
 if __name__ == "__main__":
-    collector = TechJobDataCollector()
+    parser = argparse.ArgumentParser(description="Collect tech job descriptions and generate training examples")
+    parser.add_argument('--cache-dir', default=DEFAULT_PAGE_CACHE_PATH,
+                        help=f"page cache directory (default: {DEFAULT_PAGE_CACHE_PATH})")
+    parser.add_argument('--cache-ttl', type=float, default=86400,
+                        help="seconds a cached page is used before revalidating it (default: 86400)")
+    parser.add_argument('--cache-max-mb', type=float, default=256, help="page cache size limit (default: 256)")
+    parser.add_argument('--no-cache', action='store_true', help="always download every page")
+    parser.add_argument('--offline', action='store_true',
+                        help="use only cached pages, however old, without any network traffic")
+    parser.add_argument('--dedup-index', default=DEFAULT_SIGNATURE_INDEX_PATH,
+                        help=f"signature index of every job collected so far (default: {DEFAULT_SIGNATURE_INDEX_PATH})")
+    parser.add_argument('--dedup-threshold', type=float, default=0.8,
+                        help="estimated Jaccard similarity at which a job counts as a duplicate (default: 0.8)")
+    args = parser.parse_args()
+    
+    page_cache = None if args.no_cache else PageCache(args.cache_dir, args.cache_ttl, int(args.cache_max_mb * 1024 * 1024))
+    # Jobs seen in earlier runs are skipped, so each run adds only new examples
+    dedup_index = NearDuplicateIndex(args.dedup_index, threshold=args.dedup_threshold)
+    collector = TechJobDataCollector(page_cache=page_cache, offline=args.offline, dedup_index=dedup_index)
     training_data = collector.run_data_collection()
     
-    # Save to file
-    with open('data/collected_training_data.py', 'w') as f:
-        f.write("# Real-world collected training data\n")
-        f.write("COLLECTED_TRAINING_DATA = [\n")
-        for resume, job_desc, compatibility in training_data:
-            f.write(f'    ("{resume}", "{job_desc}", "{compatibility}"),\n')
-        f.write("]\n")
+    # Save in the streaming line-delimited format that train_model and partial_fit consume. Appended rather
+    # than replaced: the dedup index already remembers these jobs, so overwriting would lose every earlier
+    # run not yet folded into the model. Remove the file once `build_model.py --update` has used it.
+    written = write_training_data(COLLECTED_TRAINING_DATA_PATH, training_data, append=True)
     
-    print(f"Saved {len(training_data)} training examples to collected_training_data.py")
\ No newline at end of file
+    print(f"Added {written} training examples to {COLLECTED_TRAINING_DATA_PATH}")
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Email Outbox
+Emails are written to the email_outbox table in the request's own transaction and delivered by a
+background sender over one reused SMTP connection, in batches, with retries and exponential backoff
+"""
+
+import time
+import uuid
+import random
+import smtplib
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from flask_mail import Mail, Message
+from sqlalchemy import event
+from models import db, OutboxEmail
+
+# Set when a transaction that queued email commits, so a sender in the same process delivers immediately
+# instead of at its next poll
+outbox_wakeup = threading.Event()
+
+def enqueue_email(recipient: str, subject: str, html_body: str, text_body: Optional[str] = None,
+                  sender: Optional[str] = None) -> OutboxEmail:
+    """Add an email to the outbox in the current session; it is sent once the caller commits"""
+    email = OutboxEmail(recipient=recipient, sender=sender, subject=subject,
+                        html_body=html_body, text_body=text_body)
+    db.session.add(email)
+    db.session.info['queued_email'] = True
+    return email
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_sender(session):
+    # Savepoint releases fire after_commit too; only the outer commit makes the email visible
+    if not session.in_nested_transaction() and session.info.pop('queued_email', False):
+        outbox_wakeup.set()
+
+class OutboxSender:
+    """Background thread that drains the outbox through a persistent SMTP connection
+
+    Due messages are claimed in batches with a per-batch token, so several processes can run senders
+    against the same database without sending a message twice. The SMTP connection is kept open between
+    batches and only re-opened after `keepalive` idle seconds or when the server drops it.
+    """
+
+    def __init__(self, app, mail: Mail, batch_size: int = 50, max_attempts: int = 6, backoff: float = 30,
+                 max_backoff: float = 3600, poll_interval: float = 2.0, keepalive: float = 30,
+                 stale_after: float = 600, retention: float = 86400):
+        self.app = app
+        self.mail = mail
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+        self.stale_after = stale_after
+        self.retention = retention
+        self.connection = None
+        self.connection_used_at = 0
+        self.stopping = threading.Event()
+        self.thread = None
+        self.counts = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="email-outbox-sender", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stopping.set()
+        outbox_wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        last_maintenance = 0
+        while not self.stopping.is_set():
+            sent = 0
+            with self.app.app_context():
+                try:
+                    if time.time() - last_maintenance > 60:
+                        last_maintenance = time.time()
+                        self.requeue_stale()
+                        self.purge_sent()
+                    sent = self.send_batch()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Email outbox sender failed: {e}")
+                finally:
+                    db.session.remove()
+
+            if self.connection is not None and time.time() - self.connection_used_at > self.keepalive:
+                self._close_connection()
+            if not sent:
+                outbox_wakeup.wait(self.poll_interval)
+                outbox_wakeup.clear()
+        self._close_connection()
+
+    def claim(self):
+        """Mark up to batch_size due messages as being sent by this sender and return them"""
+        now = datetime.utcnow()
+        due = db.session.query(OutboxEmail.id)\
+                        .filter(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now)\
+                        .order_by(OutboxEmail.next_attempt_at).limit(self.batch_size)
+        token = uuid.uuid4().hex
+        # Only rows still pending are taken, so a concurrent sender that picked the same ids gets none of them
+        OutboxEmail.query.filter(OutboxEmail.id.in_([row.id for row in due]), OutboxEmail.status == 'pending')\
+                         .update({'status': 'sending', 'claim_token': token, 'claimed_at': now},
+                                 synchronize_session=False)
+        db.session.commit()
+        return OutboxEmail.query.filter_by(claim_token=token).order_by(OutboxEmail.id).all()
+
+    def send_batch(self) -> int:
+        """Send one batch of due messages; returns how many were claimed"""
+        emails = self.claim()
+        unreachable = None
+        for email in emails:
+            error = unreachable
+            if error is None:
+                try:
+                    self._deliver(self._message(email))
+                except Exception as e:
+                    error = e
+                    if self._is_connection_error(e):
+                        # The server cannot be reached: the rest of the batch waits for a retry as well
+                        self._close_connection()
+                        unreachable = e
+
+            if error is None:
+                email.status = 'sent'
+                email.sent_at = datetime.utcnow()
+                email.html_body = email.text_body = ''  # links in the body stay valid; do not keep them
+                self.counts['sent'] += 1
+            else:
+                self._failed(email, error)
+            email.attempts += 1
+            email.claim_token = None
+        db.session.commit()
+        return len(emails)
+
+    def _message(self, email: OutboxEmail) -> Message:
+        return Message(subject=email.subject, recipients=[email.recipient], html=email.html_body,
+                       body=email.text_body, sender=email.sender or self.app.config['MAIL_DEFAULT_SENDER'])
+
+    def _deliver(self, message: Message):
+        connection = self._connection()
+        try:
+            connection.send(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the idle connection; reconnect once and try again
+            self._close_connection()
+            self._connection().send(message)
+        self.connection_used_at = time.time()
+
+    def _connection(self):
+        if self.connection is None:
+            self.connection = self.mail.connect().__enter__()
+            self.connection_used_at = time.time()
+        return self.connection
+
+    def _close_connection(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.__exit__(None, None, None)
+        except Exception:
+            pass  # Already gone
+        self.connection = None
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+            return True
+        # SMTPException derives from OSError; other OSErrors are socket failures
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    def _failed(self, email: OutboxEmail, error: Exception):
+        permanent = isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600 \
+            or isinstance(error, smtplib.SMTPRecipientsRefused)
+        email.last_error = str(error)
+        if permanent or email.attempts + 1 >= self.max_attempts:
+            email.status = 'failed'
+            self.counts['failed'] += 1
+            logging.error(f"Giving up on email {email.id} to {email.recipient}: {error}")
+            return
+
+        # Exponential backoff with jitter so a recovering server is not hit by every message at once
+        delay = min(self.max_backoff, self.backoff * (2 ** email.attempts)) * (0.5 + random.random())
+        email.status = 'pending'
+        email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        self.counts['retried'] += 1
+        logging.warning(f"Retrying email {email.id} to {email.recipient} in {delay:.0f}s after {error}")
+
+    def requeue_stale(self) -> int:
+        """Put back messages claimed by a sender that died mid-batch"""
+        count = OutboxEmail.query.filter(
+            OutboxEmail.status == 'sending',
+            OutboxEmail.claimed_at < datetime.utcnow() - timedelta(seconds=self.stale_after)
+        ).update({'status': 'pending', 'claim_token': None}, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def purge_sent(self) -> int:
+        """Delete delivered messages older than the retention window"""
+        count = OutboxEmail.query.filter(
+            OutboxEmail.status == 'sent',
+            OutboxEmail.sent_at < datetime.utcnow() - timedelta(seconds=self.retention)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued emails outside the web processes")
+    parser.add_argument('--batch-size', type=int, default=None, help="messages per batch (default: EMAIL_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    from main import app, create_outbox_sender
+
+    sender = create_outbox_sender()
+    if args.batch_size:
+        sender.batch_size = args.batch_size
+    sender.start()
+    print(f"Started email outbox sender for {app.config['MAIL_SERVER']}:{app.config['MAIL_PORT']}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        sender.stop()
@@ -0,0 +1,155 @@
+"""
+Shared Experience Extractor
+Precompiled years-of-experience pattern and keyword tables for seniority level and role type,
+used by both ResumeAnalyzer and TechJobDataCollector
+"""
+
+import re
+from collections import namedtuple
+from typing import Dict, Optional
+
+ExperienceProfile = namedtuple('ExperienceProfile', ['years', 'level', 'role'])
+
+# Checked in order; the first level with a keyword in the text wins, after the years rules below.
+# These are the analyzer's keywords and, like its scoring always has, match anywhere in a word.
+LEVEL_KEYWORDS = {
+    'senior': ('senior', 'lead', 'architect'),
+    'mid': ('mid', 'intermediate'),
+    'junior': ('junior', 'entry', 'fresh')
+}
+
+# The data collector's own level keywords, as it has always graded postings: substrings, plus whole words
+# (regex fragments) so "staffing agency" or "principal component analysis" say nothing about seniority
+POSTING_LEVEL_KEYWORDS = {
+    'senior': ('senior', 'lead'),
+    'junior': ('junior', 'entry level')
+}
+POSTING_LEVEL_WORDS = {
+    'senior': (r'principal(?!\s+components?\b)', 'staff'),
+    'junior': ('graduate',)
+}
+
+# Checked in order; the first role with a keyword in the text wins
+ROLE_KEYWORDS = {
+    'data_science': ('data scientist', 'machine learning', 'ml engineer', 'data analyst', 'statistician'),
+    'backend': ('backend', 'server-side', 'api development', 'microservices', 'database'),
+    'frontend': ('frontend', 'react', 'vue', 'angular', 'ui/ux', 'javascript'),
+    'fullstack': ('full stack', 'fullstack', 'full-stack'),
+    'devops': ('devops', 'site reliability', 'platform engineer', 'infrastructure'),
+    'mobile': ('ios', 'android', 'mobile', 'swift', 'kotlin', 'react native'),
+    'security': ('security', 'cybersecurity', 'penetration testing'),
+    'cloud': ('cloud architect', 'aws', 'azure', 'gcp', 'cloud engineer')
+}
+
+# "5+ years of experience", "3 yrs exp", "2 years in": anchored on the unit word rather than the number,
+# so the regex engine can skip ahead with a literal search; the number is read back from the match start
+_YEARS_UNIT = re.compile(r'(year|yr)s?\s*(?:(?:of\s*)?(?:experience|exp)|(in))')
+
+# Postings state requirements as "5+ years ..." or "0-2 years ..." with anything after the unit word;
+# the group is the minimum asked for (the lower bound of a range)
+_POSTING_YEARS = re.compile(r'(\d+)\s*(?:\+|(?:-|–|to)\s*\d+\s*\+?)\s*(?:year|yr)s?\b')
+
+class ExperienceExtractor:
+    """Years of experience, seniority level and role type from lowercased text"""
+
+    def __init__(self, level_keywords=LEVEL_KEYWORDS, role_keywords=ROLE_KEYWORDS, level_words=None):
+        self.level_keywords = level_keywords
+        self.role_keywords = role_keywords
+        self.level_word_patterns = {
+            level: re.compile(r'\b(?:' + '|'.join(words) + r')\b')
+            for level, words in (level_words or {}).items()
+        }
+
+    def years(self, text: str) -> int:
+        """Largest of the first stated experience in each phrasing (years/yrs, "experience"/"in"); 0 if none"""
+        return max(self._stated_years(text).values(), default=0)
+
+    def _stated_years(self, text: str) -> Dict[tuple, int]:
+        """First stated experience per phrasing"""
+        firsts = {}
+        for match in _YEARS_UNIT.finditer(text):
+            kind = (match.group(1), match.group(2) is not None)
+            if kind in firsts:
+                continue
+            number = self._number_before(text, match.start())
+            if number is not None:
+                firsts[kind] = number
+        return firsts
+
+    @staticmethod
+    def _number_before(text: str, end: int) -> Optional[int]:
+        """The integer in `<digits>[+][spaces]` ending at `end`, if any"""
+        position = end
+        while position > 0 and text[position - 1].isspace():
+            position -= 1
+        if position > 0 and text[position - 1] == '+':
+            position -= 1
+        digits_end = position
+        while position > 0 and text[position - 1].isdigit():
+            position -= 1
+        return int(text[position:digits_end]) if position < digits_end else None
+
+    def level(self, text: str, years: Optional[int] = None) -> str:
+        if years is None:
+            years = self.years(text)
+        if years >= 5 or self._has_level(text, 'senior'):
+            return 'senior'
+        if 2 <= years < 5 or self._has_level(text, 'mid'):
+            return 'mid'
+        if years < 2 or self._has_level(text, 'junior'):
+            return 'junior'
+        return 'unknown'
+
+    def _has_level(self, text: str, level: str) -> bool:
+        if self._has_any(text, self.level_keywords.get(level, ())):
+            return True
+        pattern = self.level_word_patterns.get(level)
+        return pattern is not None and pattern.search(text) is not None
+
+    def role(self, text: str) -> str:
+        for role, keywords in self.role_keywords.items():
+            if self._has_any(text, keywords):
+                return role
+        return 'general'
+
+    def extract(self, text: str) -> ExperienceProfile:
+        """Years, level and role of raw text, lowercasing it once"""
+        lower_text = text.lower()
+        years = self.years(lower_text)
+        return ExperienceProfile(years, self.level(lower_text, years), self.role(lower_text))
+
+    @staticmethod
+    def _has_any(text: str, keywords) -> bool:
+        for keyword in keywords:
+            if keyword in text:
+                return True
+        return False
+
+class PostingExperienceExtractor(ExperienceExtractor):
+    """The data collector's grading of job postings: the minimum years a posting asks for and its own
+    level keywords, defaulting to mid when the posting says nothing about experience"""
+
+    def __init__(self, level_keywords=POSTING_LEVEL_KEYWORDS, role_keywords=ROLE_KEYWORDS,
+                 level_words=POSTING_LEVEL_WORDS):
+        super().__init__(level_keywords, role_keywords, level_words)
+
+    def years(self, text: str) -> Optional[int]:
+        """Minimum years of experience the posting asks for; None if it states none"""
+        match = _POSTING_YEARS.search(text)
+        if match:
+            return int(match.group(1))
+        firsts = self._stated_years(text)
+        return max(firsts.values()) if firsts else None
+
+    def level(self, text: str, years: Optional[int] = None) -> str:
+        if years is None:
+            years = self.years(text)
+        if self._has_level(text, 'senior') or (years is not None and years >= 5):
+            return 'senior'
+        if self._has_level(text, 'junior') or (years is not None and years < 2):
+            return 'junior'
+        return 'mid'
+
+# Shared instances used by the analyzer and the data collector
+EXPERIENCE_EXTRACTOR = ExperienceExtractor()
+POSTING_EXPERIENCE_EXTRACTOR = PostingExperienceExtractor()
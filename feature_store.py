@@ -0,0 +1,105 @@
+"""
+Document Feature Store
+Persists tokens, skills and experience level per document so known resumes are never re-parsed
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from flask import has_app_context
+from models import db, DocumentFeatures
+
+class DocumentFeatureStore:
+    """DocumentFeatures-table store with a small in-process LRU in front of it"""
+
+    def __init__(self, memory_entries: int = 256, should_persist: Optional[Callable[[], bool]] = None):
+        self.memory_entries = memory_entries
+        # Lets the app keep e.g. anonymous submissions out of the database
+        self.should_persist = should_persist
+        self.recent = OrderedDict()  # content hash -> features
+        self.lock = threading.Lock()
+        # New features waiting for flush(), per thread since each thread has its own session
+        self.local = threading.local()
+
+    def _remember(self, key: str, features: Dict):
+        with self.lock:
+            self.recent[key] = features
+            self.recent.move_to_end(key)
+            while len(self.recent) > self.memory_entries:
+                self.recent.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            features = self.recent.get(key)
+            if features is not None:
+                self.recent.move_to_end(key)
+            return features
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Features for a document hash, or None when the document has not been seen"""
+        features = self._recall(key)
+        if features is not None:
+            return features
+
+        # Outside a request (offline scoring, worker pools) there is no database session
+        if not has_app_context():
+            return None
+
+        try:
+            row = DocumentFeatures.query.filter_by(content_hash=key).first()
+        except Exception as e:
+            logging.error(f"Error reading document features: {e}")
+            return None
+
+        if row is None:
+            return None
+        features = row.to_features()
+        self._remember(key, features)
+        return features
+
+    def put(self, key: str, features: Dict):
+        """Queue features of a newly parsed document; flush() writes everything queued by this thread at once"""
+        self._remember(key, features)
+        if not has_app_context() or (self.should_persist is not None and not self.should_persist()):
+            return
+
+        pending = self._pending()
+        pending[key] = features
+        if len(pending) >= self.memory_entries:
+            self.flush()
+
+    def _pending(self) -> Dict[str, Dict]:
+        if not hasattr(self.local, 'pending'):
+            self.local.pending = {}
+        return self.local.pending
+
+    def flush(self):
+        """Write the queued features in one statement inside a savepoint; they are committed with the caller's
+        transaction, and a failure never breaks the analysis or touches anything else in the session"""
+        pending = self._pending()
+        if not pending or not has_app_context():
+            return
+        self.local.pending = {}
+
+        rows = [{'content_hash': key, 'created_at': datetime.utcnow(), **features} for key, features in pending.items()]
+        try:
+            # A savepoint keeps a failed write from rolling back anything else in the caller's session
+            with db.session.begin_nested():
+                dialect = db.session.get_bind().dialect.name
+                if dialect in ('sqlite', 'postgresql'):
+                    # Another worker may store the same document between our lookup and this insert
+                    if dialect == 'sqlite':
+                        from sqlalchemy.dialects.sqlite import insert
+                    else:
+                        from sqlalchemy.dialects.postgresql import insert
+                    db.session.execute(insert(DocumentFeatures.__table__).values(rows)
+                                         .on_conflict_do_nothing(index_elements=['content_hash']))
+                else:
+                    known = set(db.session.scalars(db.select(DocumentFeatures.content_hash)
+                                                     .where(DocumentFeatures.content_hash.in_(pending))))
+                    db.session.execute(db.insert(DocumentFeatures.__table__),
+                                       [row for row in rows if row['content_hash'] not in known])
+        except Exception as e:
+            logging.error(f"Error storing document features: {e}")
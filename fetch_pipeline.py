@@ -0,0 +1,158 @@
+"""
+Concurrent Fetch Pipeline
+Thread-pool page fetching with per-host token-bucket rate limits, pooled connections,
+retries with exponential backoff and an optional on-disk page cache
+"""
+
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from page_cache import PageCache
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class FetchPipeline:
+    """Fetch many URLs concurrently while staying polite to each host"""
+
+    def __init__(self, max_workers: int = 8, per_host_rate: float = 0.5, burst: float = 1,
+                 retries: int = 3, backoff: float = 1.0, timeout: float = 15,
+                 headers: Optional[Dict[str, str]] = None, session: Optional[requests.Session] = None,
+                 cache: Optional[PageCache] = None, offline: bool = False):
+        self.max_workers = max_workers
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+        # Fresh cached pages skip the network; stale ones are revalidated with a conditional GET.
+        # Offline, only cached pages are returned, however old.
+        self.cache = cache
+        self.offline = offline
+        self.counts = {'cached': 0, 'not_modified': 0, 'downloaded': 0}
+        self.counts_lock = threading.Lock()
+
+        # One session with a pool sized to the concurrency cap, so connections are reused
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self.buckets_lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.per_host_rate, self.burst)
+            return bucket
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        # Exponential backoff with jitter so retries from many workers do not line up
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    def _count(self, outcome: str):
+        with self.counts_lock:
+            self.counts[outcome] += 1
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Return the page body, or None after exhausting retries"""
+        cached = self.cache.lookup(url) if self.cache else None
+        cached_body = self.cache.read_body(cached) if cached else None
+        if cached_body is not None and (self.offline or self.cache.is_fresh(cached)):
+            self._count('cached')
+            return cached_body
+        if self.offline:
+            return None
+
+        headers = self.cache.conditional_headers(cached) if cached_body is not None else {}
+        bucket = self._bucket(url)
+        for attempt in range(self.retries + 1):
+            bucket.acquire()
+            response = None
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+                if response.status_code == 304 and cached_body is not None:
+                    self.cache.revalidated(url)
+                    self._count('not_modified')
+                    return cached_body
+                if response.status_code not in RETRY_STATUSES:
+                    if response.ok:
+                        if self.cache:
+                            self.cache.store(url, response.text, response.headers.get('ETag'),
+                                             response.headers.get('Last-Modified'))
+                        self._count('downloaded')
+                        return response.text
+                    logging.error(f"Error fetching {url}: HTTP {response.status_code}")
+                    return None
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt < self.retries:
+                delay = self._retry_delay(attempt, response)
+                logging.warning(f"Retrying {url} in {delay:.1f}s after {error}")
+                time.sleep(delay)
+            else:
+                logging.error(f"Error fetching {url}: {error}")
+        return None
+
+    def map(self, urls: Iterable[str], handler: Callable[[str, str], object]) -> Iterator[Tuple[str, object]]:
+        """Fetch every URL and run handler(url, body) in the worker, yielding results as they complete
+
+        Handlers run as soon as their page arrives, so extraction of finished pages overlaps with
+        fetches still waiting on slower hosts; pages that could not be fetched are skipped.
+        """
+        def work(url: str):
+            body = self.fetch(url)
+            return handler(url, body) if body else None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(work, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Error processing {url}: {e}")
+                    continue
+                if result is not None:
+                    yield url, result
+
+    def close(self):
+        self.session.close()
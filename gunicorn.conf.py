@@ -0,0 +1,8 @@
+"""
+Gunicorn Configuration
+Starts the app's background services in each worker once it has loaded main:app
+"""
+
+def post_worker_init(worker):
+    from main import start_background_services
+    start_background_services()
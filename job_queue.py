@@ -0,0 +1,205 @@
+"""
+Analysis Job Queue
+SQLite-backed queue and local worker pool for running analyses off the request thread
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, Optional
+
+class SQLiteJobQueue:
+    """Durable job queue in a local SQLite file, shared by every process on the host"""
+
+    def __init__(self, path: str, result_ttl: float = 86400, stale_after: float = 600):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self.local = threading.local()
+        self.wakeup = threading.Event()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                user_id INTEGER,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_analysis_jobs_status ON analysis_jobs (status, created_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Autocommit mode so claim() can take an explicit write lock
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def submit(self, payload: Dict, user_id: Optional[int] = None) -> str:
+        """Queue a job and return its id immediately"""
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO analysis_jobs (id, status, user_id, payload, created_at) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, user_id, json.dumps(payload), time.time())
+        )
+        self.wakeup.set()
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """Atomically take the oldest queued job, or return None when the queue is empty"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, user_id, payload FROM analysis_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE analysis_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (time.time(), row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'id': row[0], 'user_id': row[1], 'payload': json.loads(row[2])}
+
+    def complete(self, job_id: str, result: Dict):
+        self._connection().execute(
+            "UPDATE analysis_jobs SET status = 'done', result = ?, payload = '{}', finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._connection().execute(
+            "UPDATE analysis_jobs SET status = 'failed', error = ?, payload = '{}', finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job status, plus the result or error once it has finished"""
+        row = self._connection().execute(
+            "SELECT id, status, user_id, result, error, created_at, finished_at FROM analysis_jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'status': row[1],
+            'user_id': row[2],
+            'result': json.loads(row[3]) if row[3] else None,
+            'error': row[4],
+            'created_at': row[5],
+            'finished_at': row[6]
+        }
+
+    def requeue_stale(self) -> int:
+        """Put back jobs whose worker died mid-analysis"""
+        cursor = self._connection().execute(
+            "UPDATE analysis_jobs SET status = 'queued', started_at = NULL WHERE status = 'running' AND started_at < ?",
+            (time.time() - self.stale_after,)
+        )
+        return cursor.rowcount
+
+    def purge_finished(self) -> int:
+        """Delete finished jobs whose results are older than the retention window"""
+        cursor = self._connection().execute(
+            "DELETE FROM analysis_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - self.result_ttl,)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+class AnalysisWorkerPool:
+    """Background threads that drain the queue through a job handler"""
+
+    def __init__(self, queue: SQLiteJobQueue, handler: Callable[[Dict], Dict],
+                 workers: int = 2, poll_interval: float = 1.0):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        self.queue.requeue_stale()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"analysis-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stopping.set()
+        self.queue.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _run(self):
+        last_maintenance = 0
+        while not self.stopping.is_set():
+            if time.time() - last_maintenance > 60:
+                last_maintenance = time.time()
+                try:
+                    self.queue.requeue_stale()
+                    self.queue.purge_finished()
+                except Exception as e:
+                    logging.error(f"Job queue maintenance failed: {e}")
+
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                logging.error(f"Error claiming analysis job: {e}")
+                job = None
+
+            if job is None:
+                # Sleep until a local submit wakes us, or poll for jobs from other processes
+                self.queue.wakeup.wait(self.poll_interval)
+                self.queue.wakeup.clear()
+                continue
+
+            try:
+                self.queue.complete(job['id'], self.handler(job))
+            except Exception as e:
+                logging.error(f"Analysis job {job['id']} failed: {e}")
+                self.queue.fail(job['id'], str(e))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run analysis workers outside the web processes")
+    parser.add_argument('--workers', type=int, default=2, help="number of worker threads (default: 2)")
+    args = parser.parse_args()
+
+    from main import analysis_queue, run_analysis_job
+
+    pool = AnalysisWorkerPool(analysis_queue, run_analysis_job, workers=args.workers)
+    pool.start()
+    print(f"Started {args.workers} analysis workers on {analysis_queue.path}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
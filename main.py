@@ -1,12 +1,22 @@
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, has_request_context
 from flask_cors import CORS
 from flask_login import LoginManager, login_required, current_user
-from models import db, User, AnalysisHistory
+from models import db, User, AnalysisHistory, UserAnalysisStats, EmailVerification, PasswordReset
+from migrate_history_storage import upgrade_history_schema
 from forms import AnalysisForm
 from auth import auth
 from email_service import mail
-from ml_engine import ResumeAnalyzer
+from password_hashing import password_hasher
+from user_cache import user_cache
+from email_outbox import OutboxSender
+from token_sweeper import TokenSweeper
+from ml_engine import ResumeAnalyzer, MODEL_METADATA_FILE
+from analysis_cache import create_analysis_cache
+from feature_store import DocumentFeatureStore
+from job_queue import SQLiteJobQueue, AnalysisWorkerPool
+from scoring_pool import ScoringPool
+from candidate_index import CandidateIndex
 import os
 import json
 from datetime import datetime
@@ -18,6 +28,24 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///resume_analyzer.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', 500))
+
+# Batches of at least SCORING_POOL_MIN_BATCH are fanned out to SCORING_PROCESSES processes (0 disables)
+app.config['SCORING_PROCESSES'] = int(os.environ.get('SCORING_PROCESSES', 0))
+app.config['SCORING_POOL_MIN_BATCH'] = int(os.environ.get('SCORING_POOL_MIN_BATCH', 200))
+
+# Analysis result cache: 'memory' (per process), 'sqlite' (shared by local workers) or 'none'
+app.config['ANALYSIS_CACHE_BACKEND'] = os.environ.get('ANALYSIS_CACHE_BACKEND', 'memory')
+app.config['ANALYSIS_CACHE_SIZE'] = int(os.environ.get('ANALYSIS_CACHE_SIZE', 1024))
+app.config['ANALYSIS_CACHE_TTL'] = int(os.environ.get('ANALYSIS_CACHE_TTL', 3600))
+app.config['ANALYSIS_CACHE_PATH'] = os.environ.get('ANALYSIS_CACHE_PATH', 'instance/analysis_cache.db')
+
+# Async analysis queue; set ANALYSIS_WORKERS=0 when running `python job_queue.py` separately
+app.config['ANALYSIS_QUEUE_PATH'] = os.environ.get('ANALYSIS_QUEUE_PATH', 'instance/analysis_jobs.db')
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', 2))
+
+# Resume matching scores only the CANDIDATE_SHORTLIST_SIZE best retrieval hits with the full model
+app.config['CANDIDATE_SHORTLIST_SIZE'] = int(os.environ.get('CANDIDATE_SHORTLIST_SIZE', 200))
 
 # Email configuration
 app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -27,10 +55,37 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@resumeanalyzer.com')
 
+# Emails go through the outbox table; set EMAIL_OUTBOX_SENDER=False when running `python email_outbox.py`
+# separately. For local development point MAIL_SERVER/MAIL_PORT at an SMTP stand-in with MAIL_USE_TLS=False.
+app.config['EMAIL_OUTBOX_SENDER'] = os.environ.get('EMAIL_OUTBOX_SENDER', 'True').lower() == 'true'
+app.config['EMAIL_BATCH_SIZE'] = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+app.config['EMAIL_MAX_ATTEMPTS'] = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+app.config['EMAIL_RETRY_BACKOFF'] = float(os.environ.get('EMAIL_RETRY_BACKOFF', 30))
+app.config['SMTP_KEEPALIVE'] = float(os.environ.get('SMTP_KEEPALIVE', 30))
+
+# Used and expired verification/reset tokens are deleted every TOKEN_SWEEP_INTERVAL seconds (0 disables)
+app.config['TOKEN_SWEEP_INTERVAL'] = float(os.environ.get('TOKEN_SWEEP_INTERVAL', 3600))
+
+# Password hashing: 'scrypt' (default), 'pbkdf2' or 'bcrypt'. PASSWORD_HASH_COST is scrypt N, pbkdf2 iterations
+# or bcrypt rounds; see `python benchmarks/bench_password_hashing.py` for logins/sec per core at each cost.
+# Existing hashes are upgraded to the current settings on the user's next successful login.
+app.config['PASSWORD_HASH_SCHEME'] = os.environ.get('PASSWORD_HASH_SCHEME', 'scrypt')
+app.config['PASSWORD_HASH_COST'] = int(os.environ['PASSWORD_HASH_COST']) if os.environ.get('PASSWORD_HASH_COST') else None
+
+# flask-login's user loader reads users from this cache: 'sqlite' (shared by the workers on this host),
+# 'memory' (per process) or 'none'. Entries expire after USER_CACHE_TTL seconds and are dropped when a user
+# row changes, but only in the cache the changing process uses: with 'memory', other workers, and with either
+# backend, other hosts, can keep serving the old user (e.g. a changed password's sessions) until the TTL.
+app.config['USER_CACHE_BACKEND'] = os.environ.get('USER_CACHE_BACKEND', 'sqlite')
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 10))
+app.config['USER_CACHE_PATH'] = os.environ.get('USER_CACHE_PATH', 'instance/user_cache.db')
+
 # Initialize extensions
 CORS(app)
 db.init_app(app)
 mail.init_app(app)
+password_hasher.init_app(app)
+user_cache.init_app(app)
 
 # Initialize Login Manager
 login_manager = LoginManager()
@@ -41,17 +96,123 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
 
 # Register blueprints
 app.register_blueprint(auth, url_prefix='/auth')
 
-# Initialize ML engine
-analyzer = ResumeAnalyzer()
+# Initialize ML engine from the prebuilt artifact (python build_model.py) when available; see setup_app
+app.config['MODEL_PATH'] = os.environ.get('MODEL_PATH', 'instance/model')
+analyzer = None
+
+def run_analysis_job(job):
+    """Run a queued analysis and save it to the submitter's history if requested"""
+    payload = job['payload']
+    
+    if job['user_id'] is None:
+        result = analyzer.analyze_compatibility(payload['resume'], payload['job_description'])
+        result['is_free_analysis'] = True
+        result['message'] = 'This was your free analysis! Register for unlimited access and to save your results.'
+        return result
+    
+    with app.app_context():
+        result = analyzer.analyze_compatibility(payload['resume'], payload['job_description'])
+        
+        if payload.get('save_analysis', False):
+            analysis = AnalysisHistory(
+                user_id=job['user_id'],
+                job_title=payload.get('job_title', 'Untitled Position'),
+                company_name=payload.get('company_name', 'Unknown Company'),
+                compatibility_score=result['compatibility_score'],
+                compatibility_level=result['compatibility_level'],
+                resume_text=payload['resume'],
+                job_description=payload['job_description'],
+                analysis_result=result
+            )
+            db.session.add(analysis)
+        # Also stores the features of documents the analysis parsed for the first time
+        db.session.commit()
+    
+    return result
+
+scoring_pool = None
+
+def get_batch_scorer(batch_size):
+    """Use the process pool for large batches when configured, the in-process analyzer otherwise"""
+    global scoring_pool
+    if app.config['SCORING_PROCESSES'] <= 0 or batch_size < app.config['SCORING_POOL_MIN_BATCH']:
+        return analyzer
+    if scoring_pool is None:
+        model_path = app.config['MODEL_PATH']
+        has_artifact = os.path.exists(os.path.join(model_path, MODEL_METADATA_FILE))
+        scoring_pool = ScoringPool(model_path if has_artifact else None, app.config['SCORING_PROCESSES'])
+    return scoring_pool
 
-# Create tables
-with app.app_context():
-    db.create_all()
+# Built lazily from history on the first match request, then kept current incrementally; see setup_app
+candidate_index = None
+analysis_queue = None
+
+def create_outbox_sender():
+    return OutboxSender(app, mail, batch_size=app.config['EMAIL_BATCH_SIZE'],
+                        max_attempts=app.config['EMAIL_MAX_ATTEMPTS'], backoff=app.config['EMAIL_RETRY_BACKOFF'],
+                        keepalive=app.config['SMTP_KEEPALIVE'])
+
+def setup_app():
+    """Load the model, open the analysis queue and create tables; runs once per process on import"""
+    global analyzer, candidate_index, analysis_queue
+    if os.path.exists(os.path.join(app.config['MODEL_PATH'], MODEL_METADATA_FILE)):
+        analyzer = ResumeAnalyzer.load(app.config['MODEL_PATH'])
+    else:
+        analyzer = ResumeAnalyzer()
+
+    analyzer.result_cache = create_analysis_cache(
+        backend=app.config['ANALYSIS_CACHE_BACKEND'],
+        max_entries=app.config['ANALYSIS_CACHE_SIZE'],
+        ttl=app.config['ANALYSIS_CACHE_TTL'],
+        path=app.config['ANALYSIS_CACHE_PATH']
+    )
+
+    # Persist parsed features of signed-in users' documents so known resumes skip re-parsing
+    if os.environ.get('DOCUMENT_FEATURE_STORE', 'True').lower() == 'true':
+        # Background jobs have no request; they only run inside an app context for signed-in users
+        analyzer.feature_store = DocumentFeatureStore(
+            should_persist=lambda: not has_request_context() or current_user.is_authenticated
+        )
+    
+    candidate_index = CandidateIndex(analyzer)
+    analysis_queue = SQLiteJobQueue(app.config['ANALYSIS_QUEUE_PATH'])
+    
+    # Create tables
+    with app.app_context():
+        db.create_all()
+        # create_all skips tables that already exist, so add columns and indexes introduced since separately
+        upgrade_history_schema(db.engine)
+        for model in (AnalysisHistory, EmailVerification, PasswordReset):
+            for index in model.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+
+# Spawned ScoringPool workers re-run the parent's __main__ script as __mp_main__ (under `python main.py`);
+# they only need scoring_pool, so they must not load the model or touch the database here
+if __name__ != '__mp_main__':
+    setup_app()
+
+analysis_pool = None
+outbox_sender = None
+token_sweeper = None
+
+def start_background_services():
+    """Start the in-process analysis workers, email sender and token sweeper; only the server calls this
+    (gunicorn.conf.py or `python main.py`), so scripts that import main never run them"""
+    global analysis_pool, outbox_sender, token_sweeper
+    if app.config['ANALYSIS_WORKERS'] > 0 and analysis_pool is None:
+        analysis_pool = AnalysisWorkerPool(analysis_queue, run_analysis_job, workers=app.config['ANALYSIS_WORKERS'])
+        analysis_pool.start()
+    if app.config['EMAIL_OUTBOX_SENDER'] and outbox_sender is None:
+        outbox_sender = create_outbox_sender()
+        outbox_sender.start()
+    if app.config['TOKEN_SWEEP_INTERVAL'] > 0 and token_sweeper is None:
+        token_sweeper = TokenSweeper(app, interval=app.config['TOKEN_SWEEP_INTERVAL'])
+        token_sweeper.start()
 
 @app.route('/')
 def index():
@@ -68,17 +229,13 @@ def index():
 @login_required
 def dashboard():
     """User dashboard"""
-    # Get user's recent analyses
-    recent_analyses = AnalysisHistory.query.filter_by(user_id=current_user.id)\
-                                          .order_by(AnalysisHistory.created_at.desc())\
-                                          .limit(5).all()
+    # Get user's recent analyses (list columns only; the heavy text columns are deferred)
+    recent_analyses = AnalysisHistory.page_for_user(current_user.id, per_page=5).items
     
-    # Get statistics
-    total_analyses = AnalysisHistory.query.filter_by(user_id=current_user.id).count()
-    
-    avg_score = db.session.query(db.func.avg(AnalysisHistory.compatibility_score))\
-                         .filter_by(user_id=current_user.id).scalar()
-    avg_score = round(avg_score, 2) if avg_score else 0
+    # Get statistics from the rollup rather than aggregating the whole history
+    stats = UserAnalysisStats.for_user(current_user.id)
+    total_analyses = stats.total_analyses
+    avg_score = round(stats.average_score, 2) if stats.average_score else 0
     
     return render_template('dashboard.html', 
                          recent_analyses=recent_analyses,
@@ -112,8 +269,8 @@ def analyze():
                     analysis_result=result
                 )
                 db.session.add(analysis)
-                db.session.commit()
                 flash('Analysis saved to your history!', 'success')
+            db.session.commit()
             
             return render_template('results.html', result=result, form=form)
             
@@ -126,12 +283,9 @@ def analyze():
 @login_required
 def history():
     """Analysis history page"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
-    
-    analyses = AnalysisHistory.query.filter_by(user_id=current_user.id)\
-                                   .order_by(AnalysisHistory.created_at.desc())\
-                                   .paginate(page=page, per_page=per_page, error_out=False)
+    # Keyset pagination: ?before=<id of the last row shown> costs the same on every page
+    before = request.args.get('before', type=int)
+    analyses = AnalysisHistory.page_for_user(current_user.id, before=before, per_page=10)
     
     return render_template('history.html', analyses=analyses)
 
@@ -139,7 +293,8 @@ def history():
 @login_required
 def view_analysis(analysis_id):
     """View specific analysis"""
-    analysis = AnalysisHistory.query.filter_by(id=analysis_id, user_id=current_user.id).first_or_404()
+    analysis = AnalysisHistory.query.options(*AnalysisHistory.with_content())\
+                                   .filter_by(id=analysis_id, user_id=current_user.id).first_or_404()
     return render_template('view_analysis.html', analysis=analysis)
 
 @app.route('/api/analyze', methods=['POST'])
@@ -167,6 +322,22 @@ def api_analyze():
         if not resume_text or not job_text:
             return jsonify({'error': 'Resume and job description cannot be empty'}), 400
         
+        # Async mode: hand the analysis to the worker pool and return a job id at once
+        if data.get('async', False):
+            job_id = analysis_queue.submit({
+                'resume': resume_text,
+                'job_description': job_text,
+                'save_analysis': data.get('save_analysis', False),
+                'job_title': data.get('job_title', 'Untitled Position'),
+                'company_name': data.get('company_name', 'Unknown Company')
+            }, user_id=current_user.id if current_user.is_authenticated else None)
+            
+            return jsonify({
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': url_for('api_analysis_job', job_id=job_id)
+            }), 202
+        
         # Perform analysis
         result = analyzer.analyze_compatibility(resume_text, job_text)
         
@@ -188,19 +359,188 @@ def api_analyze():
                 analysis_result=result
             )
             db.session.add(analysis)
-            db.session.commit()
+        db.session.commit()
         
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
+@app.route('/api/history')
+def api_history():
+    """API endpoint listing the user's saved analyses newest first, paginated with ?before=<next_cursor>"""
+    if not current_user.is_authenticated:
+        return jsonify({
+            'error': 'History requires an account. Please log in.',
+            'require_login': True
+        }), 401
+    
+    per_page = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    page = AnalysisHistory.page_for_user(current_user.id, before=request.args.get('before', type=int), per_page=per_page)
+    
+    return jsonify({
+        'analyses': [{
+            'id': analysis.id,
+            'job_title': analysis.job_title,
+            'company_name': analysis.company_name,
+            'compatibility_score': analysis.compatibility_score,
+            'compatibility_level': analysis.compatibility_level,
+            'created_at': analysis.created_at.isoformat() if analysis.created_at else None
+        } for analysis in page.items],
+        'next_cursor': page.next_cursor
+    })
+
+@app.route('/api/analyze/<job_id>')
+def api_analysis_job(job_id):
+    """Poll an async analysis job"""
+    job = analysis_queue.get(job_id)
+    
+    # Jobs submitted by a signed-in user are only visible to that user
+    if not job or (job['user_id'] is not None and
+                   (not current_user.is_authenticated or current_user.id != job['user_id'])):
+        return jsonify({'error': 'Analysis job not found'}), 404
+    
+    response = {'job_id': job['id'], 'status': job['status']}
+    if job['status'] == 'done':
+        response['result'] = job['result']
+    elif job['status'] == 'failed':
+        response['error'] = f"Analysis failed: {job['error']}"
+    
+    return jsonify(response)
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    """API endpoint ranking one resume against many jobs, or many resumes against one job"""
+    try:
+        data = request.get_json()
+        
+        if not current_user.is_authenticated:
+            return jsonify({
+                'error': 'Batch analysis requires an account. Please log in.',
+                'require_login': True
+            }), 401
+        
+        if not data:
+            return jsonify({'error': 'Missing request body'}), 400
+        
+        if isinstance(data.get('resume'), str) and isinstance(data.get('job_descriptions'), list):
+            mode = 'resume_to_jobs'
+            shared_text = data['resume'].strip()
+            texts = data['job_descriptions']
+        elif isinstance(data.get('job_description'), str) and isinstance(data.get('resumes'), list):
+            mode = 'job_to_resumes'
+            shared_text = data['job_description'].strip()
+            texts = data['resumes']
+        else:
+            return jsonify({'error': 'Provide resume with job_descriptions, or job_description with resumes'}), 400
+        
+        if not shared_text or not texts:
+            return jsonify({'error': 'Resume and job description cannot be empty'}), 400
+        
+        if len(texts) > app.config['MAX_BATCH_SIZE']:
+            return jsonify({'error': f"Batch size exceeds the limit of {app.config['MAX_BATCH_SIZE']}"}), 400
+        
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            return jsonify({'error': 'Every batch entry must be a non-empty string'}), 400
+        
+        top_k = data.get('top_k')
+        if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+            return jsonify({'error': 'top_k must be a positive integer'}), 400
+        
+        texts = [text.strip() for text in texts]
+        scorer = get_batch_scorer(len(texts))
+        if mode == 'resume_to_jobs':
+            results = scorer.analyze_many(shared_text, texts, top_k=top_k)
+        else:
+            results = scorer.analyze_many(texts, shared_text, top_k=top_k)
+        
+        # Save the returned results to history if requested
+        if data.get('save_analysis', False):
+            db.session.add_all([
+                AnalysisHistory(
+                    user_id=current_user.id,
+                    job_title=data.get('job_title', 'Untitled Position'),
+                    company_name=data.get('company_name', 'Unknown Company'),
+                    compatibility_score=result['compatibility_score'],
+                    compatibility_level=result['compatibility_level'],
+                    resume_text=shared_text if mode == 'resume_to_jobs' else texts[result['index']],
+                    job_description=texts[result['index']] if mode == 'resume_to_jobs' else shared_text,
+                    analysis_result=result
+                )
+                for result in results
+            ])
+        # Also stores the features of documents the analysis parsed for the first time
+        db.session.commit()
+        
+        return jsonify({
+            'mode': mode,
+            'total': len(texts),
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+@app.route('/api/match/resumes', methods=['POST'])
+def api_match_resumes():
+    """API endpoint ranking the user's saved resumes against a job description"""
+    try:
+        data = request.get_json()
+        
+        if not current_user.is_authenticated:
+            return jsonify({
+                'error': 'Resume matching requires an account. Please log in.',
+                'require_login': True
+            }), 401
+        
+        if not data or not isinstance(data.get('job_description'), str) or not data['job_description'].strip():
+            return jsonify({'error': 'Missing job description'}), 400
+        
+        top_k = data.get('top_k', 10)
+        if not isinstance(top_k, int) or top_k < 1:
+            return jsonify({'error': 'top_k must be a positive integer'}), 400
+        
+        job_text = data['job_description'].strip()
+        
+        # Cheap BM25 + skill-overlap shortlist first, full model scoring only on the shortlist
+        candidate_index.sync_from_history(current_user.id)
+        shortlist = candidate_index.search(current_user.id, job_text,
+                                           limit=max(top_k, app.config['CANDIDATE_SHORTLIST_SIZE']))
+        rows = {
+            row.id: row for row in AnalysisHistory.query.options(db.joinedload(AnalysisHistory.resume_document))
+                                                        .filter(AnalysisHistory.id.in_([key for key, _ in shortlist]),
+                                                                AnalysisHistory.user_id == current_user.id)
+        }
+        candidates = [(rows[key], retrieval_score) for key, retrieval_score in shortlist if key in rows]
+        
+        results = []
+        if candidates:
+            results = analyzer.analyze_many([row.resume_text for row, _ in candidates], job_text, top_k=top_k)
+            for result in results:
+                row, retrieval_score = candidates[result['index']]
+                result['history_id'] = row.id
+                result['job_title'] = row.job_title
+                result['company_name'] = row.company_name
+                result['retrieval_score'] = round(retrieval_score, 4)
+            db.session.commit()
+        
+        return jsonify({
+            'shortlisted': len(candidates),
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Matching failed: {str(e)}'}), 500
+
 @app.route('/api/status')
 def api_status():
     """API status check"""
     return jsonify({
         'status': 'ok',
         'ml_engine_trained': analyzer.is_trained(),
+        'model_version': analyzer.model_version,
+        'analysis_cache': analyzer.result_cache.stats() if analyzer.result_cache else None,
+        'user_cache': user_cache.stats(),
         'user_authenticated': current_user.is_authenticated,
         'version': '2.0.0'
     })
@@ -249,4 +589,5 @@ def internal_error(error):
     """, 500
 
 if __name__ == '__main__':
+    start_background_services()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,96 @@
+"""
+History Storage Migration
+Moves resume/job texts stored inline on analysis_history rows into the shared, compressed stored_documents
+table and re-encodes analysis results, in keyset batches so it can run while the app is serving
+"""
+
+import argparse
+from sqlalchemy import inspect, text
+
+# Columns analysis_history gained with stored_documents; create_all does not alter existing tables
+HISTORY_STORAGE_COLUMNS = {
+    'resume_document_id': 'INTEGER REFERENCES stored_documents (id)',
+    'job_document_id': 'INTEGER REFERENCES stored_documents (id)',
+    'analysis_data': None  # binary type differs per database, see upgrade_history_schema
+}
+
+def upgrade_history_schema(engine):
+    """Add the stored_documents columns to an analysis_history table created before them (idempotent)"""
+    existing = {column['name'] for column in inspect(engine).get_columns('analysis_history')}
+    missing = [name for name in HISTORY_STORAGE_COLUMNS if name not in existing]
+    if not missing:
+        return
+
+    binary_type = 'BYTEA' if engine.dialect.name == 'postgresql' else 'BLOB'
+    with engine.begin() as conn:
+        for name in missing:
+            column_type = HISTORY_STORAGE_COLUMNS[name] or binary_type
+            conn.execute(text(f"ALTER TABLE analysis_history ADD COLUMN {name} {column_type}"))
+
+def migrate_rows(batch_size: int = 500) -> int:
+    """Move inline texts and results of rows not yet migrated; returns how many rows were moved"""
+    from models import db, AnalysisHistory, StoredDocument, encode_result
+
+    history = AnalysisHistory.__table__
+    last_id = 0
+    migrated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(history.c.id, history.c.resume_text, history.c.job_description, history.c.analysis_result)
+              .where(history.c.id > last_id, history.c.resume_document_id.is_(None))
+              .order_by(history.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return migrated
+
+        for history_id, resume_text, job_description, analysis_result in rows:
+            db.session.execute(history.update().where(history.c.id == history_id).values(
+                resume_document_id=StoredDocument.store(resume_text or '').id,
+                job_document_id=StoredDocument.store(job_description or '').id,
+                analysis_data=encode_result(analysis_result or {}),
+                # Legacy columns are NOT NULL in tables created before the migration
+                resume_text='',
+                job_description='',
+                analysis_result={}
+            ))
+        db.session.commit()
+        last_id = rows[-1][0]
+        migrated += len(rows)
+        print(f"Migrated {migrated} analyses so far...")
+
+def purge_orphan_documents() -> int:
+    """Delete stored documents no analysis refers to any more (e.g. after account deletions)"""
+    from models import db, AnalysisHistory, StoredDocument
+
+    referenced = db.union(db.select(AnalysisHistory.resume_document_id),
+                          db.select(AnalysisHistory.job_document_id)).subquery()
+    result = db.session.execute(
+        db.delete(StoredDocument).where(StoredDocument.id.not_in(
+            db.select(referenced.c[0]).where(referenced.c[0].is_not(None))
+        ))
+    )
+    db.session.commit()
+    return result.rowcount
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move analysis history texts into deduplicated, compressed storage")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--purge-orphans', action='store_true',
+                        help='Also delete stored documents no analysis refers to')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='Reclaim the freed space afterwards (SQLite VACUUM / PostgreSQL VACUUM FULL)')
+    args = parser.parse_args()
+
+    from main import app
+    from models import db
+
+    with app.app_context():
+        # Importing main has already created stored_documents and added the new columns
+        print(f"Migrated {migrate_rows(args.batch_size)} analyses")
+        if args.purge_orphans:
+            print(f"Removed {purge_orphan_documents()} unreferenced documents")
+        if args.vacuum:
+            statement = 'VACUUM FULL analysis_history' if db.engine.dialect.name == 'postgresql' else 'VACUUM'
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(text(statement))
+            print("Reclaimed free space")
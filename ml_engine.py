@@ -1,37 +1,103 @@
 import re
+import os
 import math
 import json
+import hashlib
 from collections import defaultdict, Counter
-from data.real_training_data import REAL_TRAINING_DATA
+import numpy as np
+from skill_matcher import SKILL_CATEGORIES, SKILL_MATCHER, SkillMatch
+from experience_extractor import EXPERIENCE_EXTRACTOR
+from training_data import DEFAULT_TRAINING_DATA_PATH, TrainingDataStream
 
-print(f"🎯 Loaded AUTHENTIC training dataset with {len(REAL_TRAINING_DATA)} examples from real LinkedIn, Indeed, and GitHub job data!")
-DEFAULT_TRAINING_DATA = REAL_TRAINING_DATA
+# On-disk model artifact layout (see ResumeAnalyzer.save / ResumeAnalyzer.load).
+# Version 2 stores raw counts so loaded models can keep learning with partial_fit;
+# version 1 artifacts (precomputed log-probabilities only) still load for prediction.
+MODEL_FORMAT_VERSION = 2
+MODEL_METADATA_FILE = 'model.json'
+MODEL_MATRIX_FILE = 'feature_log_probs.npy'
+MODEL_COUNTS_FILE = 'word_counts.npy'
+MODEL_LOG_COUNTS_FILE = 'log_word_counts.npy'
+
+# Bump whenever tokenization, skill matching or experience extraction changes, so persisted
+# document features from the old pipeline are never reused
+DOCUMENT_FEATURE_VERSION = 4
+
+# Token ids buffered while counting before they are folded into the count matrices,
+# so training memory stays flat however large the streamed corpus is
+TRAINING_FLUSH_TOKENS = 500000
+
+def document_hash(text):
+    """Key for persisted document features"""
+    return hashlib.sha256(f"{DOCUMENT_FEATURE_VERSION}\0{text or ''}".encode('utf-8')).hexdigest()
+
+def load_default_training_data():
+    """Stream the default training corpus, falling back to the legacy Python module if it has not been converted"""
+    if os.path.exists(DEFAULT_TRAINING_DATA_PATH):
+        print(f"🎯 Streaming AUTHENTIC training dataset from {DEFAULT_TRAINING_DATA_PATH}")
+        return TrainingDataStream(DEFAULT_TRAINING_DATA_PATH)
+    
+    from data.real_training_data import REAL_TRAINING_DATA
+    print(f"🎯 Loaded AUTHENTIC training dataset with {len(REAL_TRAINING_DATA)} examples from real LinkedIn, Indeed, and GitHub job data!")
+    return REAL_TRAINING_DATA
+
+class ParsedDocument:
+    """A resume or job description tokenized and feature-extracted once, shared by every scoring stage"""
+    
+    def __init__(self, text, analyzer, features=None):
+        self.text = text or ''
+        self.lower_text = self.text.lower()
+        
+        if features is not None:
+            # Hydrate from previously persisted features instead of re-parsing
+            self.tokens = features['tokens']
+            self.skill_hits = [SkillMatch(skill, start, end, analyzer.skill_matcher.category_names.get(skill, ()))
+                               for skill, start, end in features['skill_hits']]
+            self.skills = features['skills']
+            self.experience_level = features['experience_level']
+        else:
+            self.tokens = analyzer._tokenize_lowered(self.lower_text)
+            self.skill_hits = analyzer.skill_matcher.find(self.lower_text)
+            self.skills = analyzer.skill_matcher.categorize(self.skill_hits)
+            self.experience_level = analyzer._experience_level_from_lowered(self.lower_text)
+        
+        self.token_set = set(self.tokens)
+        self.skill_slots = analyzer.skill_matcher.slot_vector(analyzer.skill_matcher.skills(self.skill_hits))
+        self.model_version = analyzer.model_version
+        self.token_ids = analyzer.token_ids(self.tokens)
+    
+    def features(self):
+        """Model-independent features in a JSON-serializable form for persistence"""
+        return {
+            'tokens': self.tokens,
+            'skill_hits': [[hit.skill, hit.start, hit.end] for hit in self.skill_hits],
+            'skills': self.skills,
+            'experience_level': self.experience_level
+        }
 
 class ResumeAnalyzer:
     """Custom Resume-Job Compatibility Analyzer with Naive Bayes Classification"""
     
-    def __init__(self):
+    def __init__(self, train=True):
         self.trained = False
-        self.vocabulary = set()
+        self.model_version = None
+        self.result_cache = None  # optional analysis_cache.AnalysisCache
+        self.feature_store = None  # optional feature_store.DocumentFeatureStore
+        self.vocabulary = {}  # token -> column index into the count matrices
+        self.classes = []
         self.class_probs = {}
-        self.word_probs = {}
-        self.skill_categories = {
-            'programming': ['python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'rust', 'swift', 'kotlin', 'scala', 'r', 'php', 'ruby', 'objective-c', 'solidity'],
-            'frameworks': ['django', 'flask', 'fastapi', 'react', 'angular', 'vue', 'nextjs', 'nuxt', 'spring', 'spring boot', 'express', 'nestjs', 'laravel', 'rails', 'dotnet', 'asp.net', 'unity', 'react native', 'flutter'],
-            'cloud': ['aws', 'azure', 'gcp', 'lambda', 'ec2', 's3', 'rds', 'eks', 'ecs', 'cloudformation', 'terraform', 'serverless', 'firebase', 'heroku', 'digitalocean'],
-            'devops': ['docker', 'kubernetes', 'jenkins', 'gitlab', 'github actions', 'ansible', 'terraform', 'helm', 'argocd', 'prometheus', 'grafana', 'elk', 'ci/cd', 'gitops'],
-            'databases': ['mysql', 'postgresql', 'mongodb', 'redis', 'sqlite', 'oracle', 'sql server', 'dynamodb', 'cassandra', 'elasticsearch', 'snowflake', 'bigquery', 'redshift'],
-            'frontend': ['html', 'css', 'javascript', 'typescript', 'react', 'vue', 'angular', 'sass', 'less', 'webpack', 'vite', 'bootstrap', 'tailwind', 'material-ui', 'styled-components'],
-            'mobile': ['swift', 'kotlin', 'java', 'react native', 'flutter', 'xamarin', 'ionic', 'objective-c', 'android', 'ios', 'xcode', 'android studio'],
-            'data_science': ['pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras', 'jupyter', 'matplotlib', 'seaborn', 'plotly', 'tableau', 'power bi', 'r', 'stata', 'spss'],
-            'big_data': ['apache spark', 'hadoop', 'kafka', 'airflow', 'dbt', 'databricks', 'snowflake', 'redshift', 'bigquery', 'hive', 'pig', 'storm', 'flink'],
-            'testing': ['junit', 'pytest', 'jest', 'cypress', 'selenium', 'testng', 'mocha', 'chai', 'enzyme', 'react testing library', 'espresso', 'xctest'],
-            'monitoring': ['prometheus', 'grafana', 'datadog', 'new relic', 'splunk', 'elk stack', 'jaeger', 'zipkin', 'pagerduty', 'sentry'],
-            'security': ['owasp', 'penetration testing', 'vulnerability assessment', 'encryption', 'oauth', 'jwt', 'ssl/tls', 'firewall', 'iam', 'security audit'],
-            'version_control': ['git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'perforce'],
-            'apis': ['rest', 'graphql', 'grpc', 'soap', 'api gateway', 'swagger', 'postman', 'insomnia', 'openapi'],
-            'methodologies': ['agile', 'scrum', 'kanban', 'lean', 'devops', 'tdd', 'bdd', 'ci/cd', 'microservices', 'mvp', 'design patterns']
-        }
+        # Raw counts, updated incrementally by partial_fit. Matrices are (classes x capacity) and
+        # grow geometrically; only the first len(vocabulary) columns are in use.
+        self.class_doc_counts = np.zeros(0)
+        self.class_totals = np.zeros(0)
+        self.word_counts = np.zeros((0, 0))
+        self.log_word_counts = np.zeros((0, 0))  # log(count + 1), kept in step with word_counts
+        # Derived per class: log P(class) and the Laplace denominator log(total + |V|)
+        self.class_log_priors = np.zeros(0)
+        self.class_log_norms = np.zeros(0)
+        self._feature_log_probs = None
+        self.skill_categories = SKILL_CATEGORIES
+        self.skill_matcher = SKILL_MATCHER
+        self.experience_extractor = EXPERIENCE_EXTRACTOR
         self.stop_words = {
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
             'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
@@ -40,7 +106,8 @@ class ResumeAnalyzer:
         }
         
         # Train model with default data
-        self.train_model()
+        if train:
+            self.train_model()
     
     def preprocess_text(self, text):
         """Preprocess text: lowercase, remove punctuation, filter stop words, tokenize"""
@@ -48,8 +115,10 @@ class ResumeAnalyzer:
             return []
         
         # Convert to lowercase
-        text = text.lower()
-        
+        return self._tokenize_lowered(text.lower())
+    
+    def _tokenize_lowered(self, text):
+        """Tokenize already-lowercased text"""
         # Remove punctuation using regex
         text = re.sub(r'[^\w\s]', ' ', text)
         
@@ -61,123 +130,333 @@ class ResumeAnalyzer:
         
         return filtered_tokens
     
+    def parse(self, text):
+        """Tokenize and extract features from a document once, reusing persisted features when known"""
+        if self.feature_store is None:
+            return ParsedDocument(text, self)
+        
+        key = document_hash(text)
+        features = self.feature_store.get(key)
+        if features is not None:
+            return ParsedDocument(text, self, features)
+        
+        doc = ParsedDocument(text, self)
+        self.feature_store.put(key, doc.features())
+        return doc
+    
+    def _flush_features(self):
+        """Store features parsed during this analysis in one write"""
+        if self.feature_store is not None:
+            self.feature_store.flush()
+    
+    def _as_document(self, doc):
+        """Accept either raw text or an already parsed document"""
+        return doc if isinstance(doc, ParsedDocument) else self.parse(doc)
+    
     def extract_experience_level(self, text):
         """Extract experience level from text using regex patterns"""
-        text = text.lower()
-        
-        # Pattern for years of experience
-        year_patterns = [
-            r'(\d+)\+?\s*years?\s*(?:of\s*)?(?:experience|exp)',
-            r'(\d+)\+?\s*yrs?\s*(?:of\s*)?(?:experience|exp)',
-            r'(\d+)\+?\s*years?\s*in',
-            r'(\d+)\+?\s*yrs?\s*in'
-        ]
-        
-        years = 0
-        for pattern in year_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                years = max(years, int(matches[0]))
-        
-        # Pattern for experience levels
-        if 'senior' in text or 'lead' in text or 'architect' in text or years >= 5:
-            return 'senior'
-        elif 'mid' in text or 'intermediate' in text or (2 <= years < 5):
-            return 'mid'
-        elif 'junior' in text or 'entry' in text or 'fresh' in text or (0 <= years < 2):
-            return 'junior'
-        else:
-            return 'unknown'
+        if isinstance(text, ParsedDocument):
+            return text.experience_level
+        return self._experience_level_from_lowered(text.lower())
+    
+    def _experience_level_from_lowered(self, text):
+        """Experience level for already-lowercased text"""
+        return self.experience_extractor.level(text)
     
     def extract_skills(self, text):
         """Extract skills from text based on predefined categories"""
-        tokens = self.preprocess_text(text)
-        found_skills = defaultdict(list)
-        
-        for category, skills in self.skill_categories.items():
-            for skill in skills:
-                if skill in tokens:
-                    found_skills[category].append(skill)
-        
-        return dict(found_skills)
+        if isinstance(text, ParsedDocument):
+            return text.skills
+        if not text:
+            return {}
+        return self.skill_matcher.categorize(self.skill_matcher.find(text.lower()))
     
     def calculate_jaccard_similarity(self, text1, text2):
         """Calculate Jaccard similarity between two texts"""
-        tokens1 = set(self.preprocess_text(text1))
-        tokens2 = set(self.preprocess_text(text2))
+        tokens1 = self._as_document(text1).token_set
+        tokens2 = self._as_document(text2).token_set
         
         if not tokens1 and not tokens2:
             return 1.0
         
-        intersection = tokens1.intersection(tokens2)
-        union = tokens1.union(tokens2)
+        # |A ∪ B| = |A| + |B| - |A ∩ B|, so only the intersection is materialized
+        intersection = len(tokens1 & tokens2)
+        union = len(tokens1) + len(tokens2) - intersection
         
-        return len(intersection) / len(union) if union else 0.0
+        return intersection / union if union else 0.0
+    
+    def _skill_overlap(self, resume_slots, job_slots):
+        """Matched and required skill counts per catalog category; works on one slot vector or a stacked matrix"""
+        category_matrix = self.skill_matcher.category_matrix
+        return (resume_slots & job_slots) @ category_matrix, job_slots @ category_matrix
+    
+    def _overlap_many(self, shared, documents, shared_is_resume):
+        """Text similarity and per-category matched/required skill counts for one document against many
+        
+        Skill overlap for every pair is one matrix product over the stacked slot vectors. Jaccard stays on
+        the token sets: a set intersection is cheaper than building a hashed token array per document.
+        """
+        text_similarities = np.array([self.calculate_jaccard_similarity(shared, doc) for doc in documents])
+        slots = np.vstack([doc.skill_slots for doc in documents])
+        if shared_is_resume:
+            matched, required = self._skill_overlap(shared.skill_slots, slots)
+        else:
+            matched, required = self._skill_overlap(slots, shared.skill_slots)
+            required = np.broadcast_to(required, matched.shape)
+        return text_similarities, matched, required
     
     def train_model(self, training_data=None):
         """Train Naive Bayes model with training data"""
         if training_data is None:
-            training_data = DEFAULT_TRAINING_DATA
+            training_data = load_default_training_data()
             
-        print(f"🧠 Training model with {len(training_data)} examples...")
-        
-        # Initialize counters
-        class_counts = Counter()
-        word_class_counts = defaultdict(Counter)
-        vocabulary = set()
-        
-        # Process training data
-        for resume, job_desc, compatibility in training_data:
+        if hasattr(training_data, '__len__'):
+            print(f"🧠 Training model with {len(training_data)} examples...")
+        else:
+            print("🧠 Training model from stream...")
+        
+        # Start from empty counts; a full train is just one large partial_fit
+        self.vocabulary = {}
+        self.classes = []
+        self.class_doc_counts = np.zeros(0)
+        self.class_totals = np.zeros(0)
+        self.word_counts = np.zeros((0, 0))
+        self.log_word_counts = np.zeros((0, 0))
+        self.model_version = None
+        
+        self._update_counts(training_data)
+        self.model_version = self._compute_model_version()
+        self._finish_update()
+    
+    def partial_fit(self, examples):
+        """Incrementally learn from new (resume, job_description, compatibility) examples
+        
+        Only the counts touched by the new examples are updated, so the cost grows with
+        the size of the new data rather than the whole corpus.
+        """
+        if self.word_counts is not None and not self.word_counts.flags.writeable:
+            # Loaded from a memory-mapped artifact; take private copies before mutating
+            self.word_counts = np.array(self.word_counts)
+            self.log_word_counts = np.array(self.log_word_counts)
+        if self.word_counts is None:
+            raise Exception("Model artifact has no raw counts; retrain or rebuild it to use partial_fit")
+        
+        digest = self._update_counts(examples)
+        if digest is None:
+            return self
+        
+        # Chain the version from the previous one instead of re-hashing every parameter
+        self.model_version = hashlib.sha256(f"{self.model_version}:{digest}".encode('utf-8')).hexdigest()[:16]
+        self._finish_update()
+        return self
+    
+    def _update_counts(self, examples):
+        """Fold examples into the raw counts; returns a digest of the examples, or None if there were none"""
+        digest = hashlib.sha256()
+        class_token_ids = defaultdict(list)
+        class_docs = Counter()
+        vocabulary = self.vocabulary
+        examples_seen = 0
+        buffered = 0
+        
+        # Process training data, mapping every token to a stable column id
+        for resume, job_desc, compatibility in examples:
             # Combine resume and job description for feature extraction
             combined_text = resume + " " + job_desc
             tokens = self.preprocess_text(combined_text)
+            digest.update(json.dumps([resume, job_desc, compatibility]).encode('utf-8'))
+            examples_seen += 1
             
-            class_counts[compatibility] += 1
-            vocabulary.update(tokens)
-            
+            class_docs[compatibility] += 1
+            ids = class_token_ids[compatibility]
             for token in tokens:
-                word_class_counts[compatibility][token] += 1
-        
-        # Calculate class probabilities
-        total_docs = sum(class_counts.values())
-        self.class_probs = {cls: count / total_docs for cls, count in class_counts.items()}
-        
-        # Calculate word probabilities with Laplace smoothing
-        self.vocabulary = vocabulary
-        vocab_size = len(vocabulary)
-        
-        self.word_probs = {}
-        for cls in class_counts:
-            self.word_probs[cls] = {}
-            total_words = sum(word_class_counts[cls].values())
+                ids.append(vocabulary.setdefault(token, len(vocabulary)))
             
-            for word in vocabulary:
-                word_count = word_class_counts[cls][word]
-                # Laplace smoothing
-                self.word_probs[cls][word] = (word_count + 1) / (total_words + vocab_size)
-        
+            buffered += len(tokens)
+            if buffered >= TRAINING_FLUSH_TOKENS:
+                self._flush_counts(class_docs, class_token_ids)
+                class_docs.clear()
+                class_token_ids.clear()
+                buffered = 0
+        
+        if not examples_seen:
+            return None
+        
+        self._flush_counts(class_docs, class_token_ids)
+        return digest.hexdigest()
+    
+    def _flush_counts(self, class_docs, class_token_ids):
+        """Add buffered per-class document counts and token ids to the count matrices"""
+        self._reserve(len(self.vocabulary), [cls for cls in class_docs if cls not in self.classes])
+        
+        for cls, count in class_docs.items():
+            row = self.classes.index(cls)
+            self.class_doc_counts[row] += count
+            ids = np.asarray(class_token_ids[cls], dtype=np.intp)
+            if not len(ids):
+                continue
+            # Touch only the columns that occur in the new data
+            columns, counts = np.unique(ids, return_counts=True)
+            self.word_counts[row, columns] += counts
+            self.log_word_counts[row, columns] = np.log1p(self.word_counts[row, columns])
+            self.class_totals[row] += len(ids)
+    
+    def _reserve(self, vocab_size, new_classes):
+        """Grow the count matrices to hold vocab_size columns and any new class rows"""
+        rows = len(self.classes) + len(new_classes)
+        capacity = self.word_counts.shape[1]
+        if vocab_size > capacity:
+            capacity = max(vocab_size, capacity * 2, 1024)
+        
+        if rows != self.word_counts.shape[0] or capacity != self.word_counts.shape[1]:
+            word_counts = np.zeros((rows, capacity))
+            log_word_counts = np.zeros((rows, capacity))
+            used = min(self.word_counts.shape[1], capacity)
+            word_counts[:len(self.classes), :used] = self.word_counts[:, :used]
+            log_word_counts[:len(self.classes), :used] = self.log_word_counts[:, :used]
+            self.word_counts = word_counts
+            self.log_word_counts = log_word_counts
+        
+        if new_classes:
+            self.classes = self.classes + new_classes
+            self.class_doc_counts = np.concatenate([self.class_doc_counts, np.zeros(len(new_classes))])
+            self.class_totals = np.concatenate([self.class_totals, np.zeros(len(new_classes))])
+    
+    def _finish_update(self):
+        """Refresh the cheap per-class terms after the counts changed"""
+        total_docs = self.class_doc_counts.sum()
+        self.class_probs = {cls: count / total_docs for cls, count in zip(self.classes, self.class_doc_counts.tolist())}
+        self.class_log_priors = np.log(self.class_doc_counts / total_docs)
+        self.class_log_norms = np.log(self.class_totals + len(self.vocabulary))
+        # Full smoothed table is only rebuilt if someone asks for it
+        self._feature_log_probs = None
         self.trained = True
+        
+        # Results computed by the previous model are stale now
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+    
+    @property
+    def feature_log_probs(self):
+        """Smoothed log P(word | class) as a (classes x vocabulary) matrix, derived lazily from the counts"""
+        if self._feature_log_probs is None:
+            vocab_size = len(self.vocabulary)
+            self._feature_log_probs = self.log_word_counts[:, :vocab_size] - self.class_log_norms[:, None]
+        return self._feature_log_probs
+    
+    def _compute_model_version(self):
+        """Content hash of the trained parameters, used to tag artifacts and derived results"""
+        vocab_size = len(self.vocabulary)
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.classes, list(self.vocabulary)]).encode('utf-8'))
+        digest.update(np.ascontiguousarray(self.class_doc_counts).tobytes())
+        digest.update(np.ascontiguousarray(self.log_word_counts[:, :vocab_size]).tobytes())
+        return digest.hexdigest()[:16]
+    
+    def save(self, path):
+        """Write the trained model to a versioned artifact directory"""
+        if not self.trained:
+            raise Exception("Model not trained")
+        if self.word_counts is None:
+            raise Exception("Model artifact has no raw counts to save")
+        
+        os.makedirs(path, exist_ok=True)
+        vocab_size = len(self.vocabulary)
+        metadata = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'model_version': self.model_version,
+            'classes': self.classes,
+            'class_doc_counts': self.class_doc_counts.tolist(),
+            'class_totals': self.class_totals.tolist(),
+            # Tokens in column order, so list position == matrix column
+            'vocabulary': sorted(self.vocabulary, key=self.vocabulary.get)
+        }
+        
+        # Write to temporary names first so a concurrent load never sees a half-written model
+        files = [
+            (MODEL_COUNTS_FILE, self.word_counts[:, :vocab_size]),
+            (MODEL_LOG_COUNTS_FILE, self.log_word_counts[:, :vocab_size])
+        ]
+        for name, matrix in files:
+            with open(os.path.join(path, name) + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float64))
+        metadata_path = os.path.join(path, MODEL_METADATA_FILE)
+        with open(metadata_path + '.tmp', 'w') as f:
+            json.dump(metadata, f)
+        for name, _ in files:
+            os.replace(os.path.join(path, name) + '.tmp', os.path.join(path, name))
+        os.replace(metadata_path + '.tmp', metadata_path)
+    
+    @classmethod
+    def load(cls, path):
+        """Load a saved model artifact, memory-mapping the count tables read-only"""
+        with open(os.path.join(path, MODEL_METADATA_FILE)) as f:
+            metadata = json.load(f)
+        
+        format_version = metadata.get('format_version')
+        if format_version not in (1, MODEL_FORMAT_VERSION):
+            raise Exception(f"Unsupported model format version: {format_version}")
+        
+        analyzer = cls(train=False)
+        analyzer.classes = metadata['classes']
+        analyzer.vocabulary = {token: index for index, token in enumerate(metadata['vocabulary'])}
+        
+        # mmap lets forked workers share the same page-cache pages instead of private copies
+        if format_version == 1:
+            # Precomputed log-probabilities only: predict with them directly, no further training
+            analyzer.log_word_counts = np.load(os.path.join(path, MODEL_MATRIX_FILE), mmap_mode='r')
+            analyzer.word_counts = None
+            analyzer.class_log_priors = np.array(metadata['class_log_priors'])
+            analyzer.class_log_norms = np.zeros(len(analyzer.classes))
+            analyzer.class_probs = dict(zip(analyzer.classes, np.exp(analyzer.class_log_priors).tolist()))
+        else:
+            analyzer.word_counts = np.load(os.path.join(path, MODEL_COUNTS_FILE), mmap_mode='r')
+            analyzer.log_word_counts = np.load(os.path.join(path, MODEL_LOG_COUNTS_FILE), mmap_mode='r')
+            analyzer.class_doc_counts = np.array(metadata['class_doc_counts'])
+            analyzer.class_totals = np.array(metadata['class_totals'])
+            analyzer._finish_update()
+        
+        if analyzer.log_word_counts.shape != (len(analyzer.classes), len(analyzer.vocabulary)):
+            raise Exception("Model artifact is inconsistent: matrix shape does not match vocabulary")
+        
+        analyzer.model_version = metadata['model_version']
+        analyzer.trained = True
+        return analyzer
+    
+    def token_ids(self, tokens):
+        """Map tokens to vocabulary column ids, dropping out-of-vocabulary tokens"""
+        vocabulary = self.vocabulary
+        return np.fromiter((vocabulary[token] for token in tokens if token in vocabulary), dtype=np.intp)
+    
+    def _document_token_ids(self, doc):
+        """Vocabulary ids for a parsed document, remapped if the model changed since it was parsed"""
+        if doc.model_version != self.model_version:
+            doc.token_ids = self.token_ids(doc.tokens)
+            doc.model_version = self.model_version
+        return doc.token_ids
+    
+    def vectorize(self, token_ids):
+        """Collapse vocabulary ids into a sparse count vector as (column ids, counts)"""
+        if not len(token_ids):
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        columns, counts = np.unique(token_ids, return_counts=True)
+        return columns, counts.astype(np.float64)
     
     def predict_compatibility_class(self, resume, job_description):
         """Predict compatibility class using Naive Bayes"""
         if not self.trained:
             raise Exception("Model not trained")
         
-        combined_text = resume + " " + job_description
-        tokens = self.preprocess_text(combined_text)
-        
-        class_scores = {}
+        # Tokens of the combined text are the resume tokens followed by the job tokens
+        resume_doc = self._as_document(resume)
+        job_doc = self._as_document(job_description)
+        token_ids = np.concatenate([self._document_token_ids(resume_doc), self._document_token_ids(job_doc)])
         
-        for cls in self.class_probs:
-            # Start with log of class probability
-            score = math.log(self.class_probs[cls])
-            
-            # Add log probabilities for each word
-            for token in tokens:
-                if token in self.vocabulary:
-                    score += math.log(self.word_probs[cls][token])
-            
-            class_scores[cls] = score
+        # Log prior plus one sparse dot product per class; the smoothing denominator is applied
+        # once per token rather than materializing the full log-probability table
+        columns, counts = self.vectorize(token_ids)
+        scores = self.class_log_priors + self.log_word_counts[:, columns] @ counts - self.class_log_norms * counts.sum()
+        class_scores = dict(zip(self.classes, scores.tolist()))
         
         # Get the class with highest probability
         predicted_class = max(class_scores, key=class_scores.get)
@@ -192,8 +471,10 @@ class ResumeAnalyzer:
     
     def generate_recommendations(self, resume, job_description):
         """Generate improvement recommendations based on gap analysis"""
-        resume_skills = self.extract_skills(resume)
-        job_skills = self.extract_skills(job_description)
+        resume = self._as_document(resume)
+        job_description = self._as_document(job_description)
+        resume_skills = resume.skills
+        job_skills = job_description.skills
         
         recommendations = []
         
@@ -215,8 +496,8 @@ class ResumeAnalyzer:
                 })
         
         # Experience level recommendation
-        resume_exp = self.extract_experience_level(resume)
-        job_exp = self.extract_experience_level(job_description)
+        resume_exp = resume.experience_level
+        job_exp = job_description.experience_level
         
         if resume_exp == 'junior' and job_exp in ['mid', 'senior']:
             recommendations.append({
@@ -237,83 +518,222 @@ class ResumeAnalyzer:
         
         return recommendations[:5]  # Limit to top 5 recommendations
     
+    def predict_many(self, shared, documents):
+        """Class probabilities for one shared document paired with each of many documents
+        
+        Naive Bayes log-likelihoods are additive over token counts, so the shared side is
+        scored once and every other document adds its own sparse term in one vectorized pass.
+        """
+        if not self.trained:
+            raise Exception("Model not trained")
+        
+        shared_columns, shared_counts = self.vectorize(self._document_token_ids(shared))
+        shared_scores = (self.class_log_priors + self.log_word_counts[:, shared_columns] @ shared_counts
+                         - self.class_log_norms * shared_counts.sum())
+        
+        token_ids = [self._document_token_ids(doc) for doc in documents]
+        lengths = np.array([len(ids) for ids in token_ids], dtype=np.float64)
+        owners = np.repeat(np.arange(len(documents)), lengths.astype(np.intp))
+        all_ids = np.concatenate(token_ids) if token_ids else np.zeros(0, dtype=np.intp)
+        document_scores = np.vstack([
+            np.bincount(owners, weights=self.log_word_counts[class_index, all_ids], minlength=len(documents))
+            for class_index in range(len(self.classes))
+        ]) - self.class_log_norms[:, None] * lengths
+        
+        # Softmax over classes for every document at once
+        scores = shared_scores[:, None] + document_scores
+        exp_scores = np.exp(scores - scores.max(axis=0))
+        probabilities = exp_scores / exp_scores.sum(axis=0)
+        
+        return [dict(zip(self.classes, column)) for column in probabilities.T.tolist()]
+    
+    def _experience_match(self, resume_exp, job_exp):
+        return 1.0 if resume_exp == job_exp else 0.5 if resume_exp == 'unknown' or job_exp == 'unknown' else 0.3
+    
+    def _detailed_analysis(self, match_percentages, exp_match_score, text_similarity):
+        """Per-category skill match (NaN where the job needs none of the category), experience and text match"""
+        skill_matches = {
+            category.title(): "N/A" if math.isnan(match_percentage) else f"{int(match_percentage * 100)}%"
+            for category, match_percentage in zip(self.skill_matcher.category_list, match_percentages)
+        }
+        return {
+            "skill_matches": skill_matches,
+            "experience_match": f"{int(exp_match_score * 100)}%",
+            "text_similarity": f"{int(text_similarity * 100)}%"
+        }
+    
+    def _score_pair(self, resume, job_description, class_probabilities):
+        """Combine class probabilities with skill, text and experience overlap into a final score"""
+        # Calculate base compatibility score
+        base_score = class_probabilities.get('high', 0) * 0.8 + class_probabilities.get('medium', 0) * 0.5 + class_probabilities.get('low', 0) * 0.2
+        
+        # Calculate skill match percentages
+        matched, required = self._skill_overlap(resume.skill_slots, job_description.skill_slots)
+        match_percentages = []
+        overall_skill_match = 0
+        total_categories = 0
+        
+        for matched_count, required_count in zip(matched.tolist(), required.tolist()):
+            if required_count:
+                match_percentage = matched_count / required_count
+                overall_skill_match += match_percentage
+                total_categories += 1
+            else:
+                match_percentage = math.nan
+            match_percentages.append(match_percentage)
+        
+        if total_categories > 0:
+            overall_skill_match /= total_categories
+        
+        # Calculate text similarity
+        text_similarity = self.calculate_jaccard_similarity(resume, job_description)
+        
+        # Calculate experience match
+        exp_match_score = self._experience_match(resume.experience_level, job_description.experience_level)
+        
+        # Combine all factors for final score
+        final_score = (base_score * 0.4 + overall_skill_match * 0.35 + text_similarity * 0.15 + exp_match_score * 0.1)
+        final_score = min(final_score, 1.0)  # Cap at 1.0
+        
+        return final_score, self._detailed_analysis(match_percentages, exp_match_score, text_similarity)
+    
+    def _score_many(self, pairs, probabilities, text_similarities, matched, required):
+        """Final scores of many pairs at once
+        
+        Works column by column with the same float operations, in the same order, as _score_pair,
+        so batch and single-pair scores are identical. Returns (final scores, match percentages, experience scores).
+        """
+        def class_column(name):
+            return np.array([class_probabilities.get(name, 0) for class_probabilities in probabilities], dtype=np.float64)
+        base_scores = class_column('high') * 0.8 + class_column('medium') * 0.5 + class_column('low') * 0.2
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            match_percentages = np.where(required > 0, matched / required, np.nan)
+        overall_skill_match = np.zeros(len(pairs))
+        total_categories = np.zeros(len(pairs))
+        for column in match_percentages.T:
+            present = ~np.isnan(column)
+            overall_skill_match = np.where(present, overall_skill_match + column, overall_skill_match)
+            total_categories += present
+        overall_skill_match = np.where(total_categories > 0, overall_skill_match / np.maximum(total_categories, 1), 0.0)
+        
+        exp_match_scores = np.array([self._experience_match(resume.experience_level, job_description.experience_level)
+                                     for resume, job_description in pairs])
+        
+        final_scores = base_scores * 0.4 + overall_skill_match * 0.35 + text_similarities * 0.15 + exp_match_scores * 0.1
+        return np.minimum(final_scores, 1.0), match_percentages, exp_match_scores
+    
+    def _build_report(self, resume, job_description, final_score, detailed_analysis):
+        """Assemble the compatibility report returned to clients"""
+        # Determine compatibility level
+        if final_score >= 0.8:
+            compatibility_level = "Excellent Match"
+        elif final_score >= 0.6:
+            compatibility_level = "Good Match"
+        elif final_score >= 0.4:
+            compatibility_level = "Fair Match"
+        else:
+            compatibility_level = "Poor Match"
+        
+        # Generate recommendations
+        recommendations = self.generate_recommendations(resume, job_description)
+        
+        # Calculate improvement potential
+        current_percentage = int(final_score * 100)
+        max_improvement = min(100 - current_percentage, 25)
+        improvement_potential = f"+{max_improvement}%"
+        
+        return {
+            "compatibility_score": round(final_score, 2),
+            "compatibility_level": compatibility_level,
+            "detailed_analysis": detailed_analysis,
+            "recommendations": recommendations,
+            "improvement_potential": improvement_potential
+        }
+    
     def analyze_compatibility(self, resume, job_description):
         """Main analysis function that returns comprehensive compatibility report"""
         try:
-            # Predict compatibility class
-            predicted_class, class_probabilities = self.predict_compatibility_class(resume, job_description)
-            
-            # Calculate base compatibility score
-            base_score = class_probabilities.get('high', 0) * 0.8 + class_probabilities.get('medium', 0) * 0.5 + class_probabilities.get('low', 0) * 0.2
+            if self.result_cache is not None:
+                resume_text = resume.text if isinstance(resume, ParsedDocument) else resume
+                job_text = job_description.text if isinstance(job_description, ParsedDocument) else job_description
+                cached = self.result_cache.get(resume_text, job_text, self.model_version)
+                if cached is not None:
+                    return cached
             
-            # Extract skills for detailed analysis
-            resume_skills = self.extract_skills(resume)
-            job_skills = self.extract_skills(job_description)
+            # Tokenize and extract features once per input; every stage below reuses them
+            resume = self._as_document(resume)
+            job_description = self._as_document(job_description)
+            self._flush_features()
             
-            # Calculate skill match percentages
-            skill_matches = {}
-            overall_skill_match = 0
-            total_categories = 0
-            
-            for category in self.skill_categories.keys():
-                resume_category_skills = set(resume_skills.get(category, []))
-                job_category_skills = set(job_skills.get(category, []))
-                
-                if job_category_skills:
-                    match_percentage = len(resume_category_skills.intersection(job_category_skills)) / len(job_category_skills)
-                    skill_matches[category.title()] = f"{int(match_percentage * 100)}%"
-                    overall_skill_match += match_percentage
-                    total_categories += 1
-                else:
-                    skill_matches[category.title()] = "N/A"
+            # Predict compatibility class
+            predicted_class, class_probabilities = self.predict_compatibility_class(resume, job_description)
             
-            if total_categories > 0:
-                overall_skill_match /= total_categories
+            final_score, detailed_analysis = self._score_pair(resume, job_description, class_probabilities)
+            report = self._build_report(resume, job_description, final_score, detailed_analysis)
             
-            # Calculate text similarity
-            text_similarity = self.calculate_jaccard_similarity(resume, job_description)
+            if self.result_cache is not None:
+                self.result_cache.set(resume.text, job_description.text, self.model_version, report)
             
-            # Calculate experience match
-            resume_exp = self.extract_experience_level(resume)
-            job_exp = self.extract_experience_level(job_description)
-            exp_match_score = 1.0 if resume_exp == job_exp else 0.5 if resume_exp == 'unknown' or job_exp == 'unknown' else 0.3
+            return report
             
-            # Combine all factors for final score
-            final_score = (base_score * 0.4 + overall_skill_match * 0.35 + text_similarity * 0.15 + exp_match_score * 0.1)
-            final_score = min(final_score, 1.0)  # Cap at 1.0
+        except Exception as e:
+            raise Exception(f"Analysis failed: {str(e)}")
+    
+    def analyze_many(self, resumes, job_descriptions, top_k=None):
+        """Rank one resume against many jobs, or many resumes against one job
+        
+        Exactly one side must be a list; the other is parsed once and shared by every pair.
+        Returns reports sorted by compatibility score, each tagged with its input index and rank.
+        """
+        results = self._rank_many(resumes, job_descriptions, top_k)
+        for report in results:
+            del report["_score"]
+        return results
+    
+    def _rank_many(self, resumes, job_descriptions, top_k=None):
+        """analyze_many, with each report also carrying its unrounded score as "_score" for merging rankings"""
+        try:
+            # Either side may be raw text or an already parsed document
+            shared_is_resume = isinstance(resumes, (str, ParsedDocument))
+            if shared_is_resume == isinstance(job_descriptions, (str, ParsedDocument)):
+                raise ValueError("Provide one resume with many job descriptions, or many resumes with one job description")
             
-            # Determine compatibility level
-            if final_score >= 0.8:
-                compatibility_level = "Excellent Match"
-            elif final_score >= 0.6:
-                compatibility_level = "Good Match"
-            elif final_score >= 0.4:
-                compatibility_level = "Fair Match"
+            shared = self._as_document(resumes if shared_is_resume else job_descriptions)
+            documents = [self._as_document(text) for text in (job_descriptions if shared_is_resume else resumes)]
+            self._flush_features()
+            if shared_is_resume:
+                pairs = [(shared, doc) for doc in documents]
             else:
-                compatibility_level = "Poor Match"
+                pairs = [(doc, shared) for doc in documents]
+            if not documents:
+                return []
             
-            # Generate recommendations
-            recommendations = self.generate_recommendations(resume, job_description)
+            probabilities = self.predict_many(shared, documents)
+            text_similarities, matched, required = self._overlap_many(shared, documents, shared_is_resume)
+            final_scores, match_percentages, exp_match_scores = self._score_many(
+                pairs, probabilities, text_similarities, matched, required)
             
-            # Calculate improvement potential
-            current_percentage = int(final_score * 100)
-            max_improvement = min(100 - current_percentage, 25)
-            improvement_potential = f"+{max_improvement}%"
+            # Rank first so detailed analysis and recommendations are only built for the pairs actually returned
+            order = np.argsort(-final_scores, kind='stable')
+            if top_k is not None:
+                order = order[:top_k]
             
-            return {
-                "compatibility_score": round(final_score, 2),
-                "compatibility_level": compatibility_level,
-                "detailed_analysis": {
-                    "skill_matches": skill_matches,
-                    "experience_match": f"{int(exp_match_score * 100)}%",
-                    "text_similarity": f"{int(text_similarity * 100)}%"
-                },
-                "recommendations": recommendations,
-                "improvement_potential": improvement_potential
-            }
+            results = []
+            for rank, index in enumerate(order.tolist(), start=1):
+                detailed_analysis = self._detailed_analysis(match_percentages[index].tolist(),
+                                                            float(exp_match_scores[index]),
+                                                            float(text_similarities[index]))
+                report = self._build_report(*pairs[index], float(final_scores[index]), detailed_analysis)
+                report["index"] = index
+                report["rank"] = rank
+                report["_score"] = float(final_scores[index])
+                results.append(report)
+            
+            return results
             
         except Exception as e:
-            raise Exception(f"Analysis failed: {str(e)}")
+            raise Exception(f"Batch analysis failed: {str(e)}")
     
     def is_trained(self):
         """Check if model is trained"""
@@ -1,8 +1,13 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from password_hashing import password_hasher
 from datetime import datetime, timedelta
+import json
+import zlib
+import hashlib
 import secrets
 
 db = SQLAlchemy()
@@ -22,14 +27,20 @@ class User(UserMixin, db.Model):
     
     # Relationships
     analysis_history = db.relationship('AnalysisHistory', backref='user', lazy=True, cascade='all, delete-orphan')
+    analysis_stats = db.relationship('UserAnalysisStats', uselist=False, lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check password against hash, upgrading a hash made with older settings once it matches"""
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        if password_hasher.needs_rehash(self.password_hash):
+            # Saved with the caller's next commit
+            self.set_password(password)
+        return True
     
     def get_full_name(self):
         """Get user's full name"""
@@ -38,8 +49,43 @@ class User(UserMixin, db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
-class EmailVerification(db.Model):
+class SingleUseToken:
+    """Lookups and cleanup shared by EmailVerification and PasswordReset, done in SQL rather than per row"""
+    
+    @classmethod
+    def find_valid(cls, token):
+        """The unused, unexpired token row, or None"""
+        return cls.query.filter(cls.token == token, cls.is_used == db.false(),
+                                cls.expires_at > datetime.utcnow()).first()
+    
+    @classmethod
+    def invalidate_for_users(cls, user_ids):
+        """Mark every outstanding token of these users as used, in one statement"""
+        return cls.query.filter(cls.user_id.in_(user_ids), cls.is_used == db.false(),
+                                cls.expires_at > datetime.utcnow())\
+                        .update({'is_used': True}, synchronize_session=False)
+    
+    @classmethod
+    def sweep(cls, batch_size=1000):
+        """Delete used and expired tokens in batches, committing after each; returns how many were removed"""
+        removed = 0
+        while True:
+            batch = db.session.query(cls.id).filter(db.or_(cls.is_used == db.true(),
+                                                           cls.expires_at <= datetime.utcnow()))\
+                                            .limit(batch_size).subquery()
+            count = cls.query.filter(cls.id.in_(db.select(batch.c.id))).delete(synchronize_session=False)
+            db.session.commit()
+            removed += count
+            if count < batch_size:
+                return removed
+
+class EmailVerification(SingleUseToken, db.Model):
     __tablename__ = 'email_verifications'
+    # Outstanding tokens of a user (resend invalidation), and expired ones (sweeping)
+    __table_args__ = (
+        db.Index('ix_email_verifications_user_id_is_used_expires_at', 'user_id', 'is_used', 'expires_at'),
+        db.Index('ix_email_verifications_expires_at', 'expires_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -63,8 +109,12 @@ class EmailVerification(db.Model):
         """Check if token is valid (not used and not expired)"""
         return not self.is_used and not self.is_expired()
 
-class PasswordReset(db.Model):
+class PasswordReset(SingleUseToken, db.Model):
     __tablename__ = 'password_resets'
+    __table_args__ = (
+        db.Index('ix_password_resets_user_id_is_used_expires_at', 'user_id', 'is_used', 'expires_at'),
+        db.Index('ix_password_resets_expires_at', 'expires_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -88,8 +138,102 @@ class PasswordReset(db.Model):
         """Check if token is valid (not used and not expired)"""
         return not self.is_used and not self.is_expired()
 
+class OutboxEmail(db.Model):
+    """An email waiting to be delivered (or kept briefly after delivery) by the background sender"""
+    __tablename__ = 'email_outbox'
+    # The sender scans for due messages in this order
+    __table_args__ = (db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    sender = db.Column(db.String(120))
+    subject = db.Column(db.String(200), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    text_body = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent or failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<OutboxEmail {self.id} to {self.recipient}: {self.status}>'
+
+class KeysetPage:
+    """One page of a newest-first listing; pass next_cursor back as ?before= to get the next page"""
+    
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+class StoredDocument(db.Model):
+    """Resume or job description text stored once per distinct content, zlib-compressed"""
+    __tablename__ = 'stored_documents'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    content = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def text(self):
+        return zlib.decompress(self.content).decode('utf-8')
+    
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def store(cls, text):
+        """The stored document holding exactly this text, inserting it if it is new"""
+        content_hash = cls.hash_text(text)
+        document = cls.query.filter_by(content_hash=content_hash).first()
+        if document is not None:
+            return document
+        
+        values = {
+            'content_hash': content_hash,
+            'content': zlib.compress(text.encode('utf-8'), 6),
+            'size': len(text),
+            'created_at': datetime.utcnow()
+        }
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            # Concurrent writers of the same new text must not fail each other's transactions
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            db.session.execute(insert(cls.__table__).values(**values)
+                                .on_conflict_do_nothing(index_elements=['content_hash']))
+            return cls.query.filter_by(content_hash=content_hash).one()
+        
+        document = cls(**values)
+        db.session.add(document)
+        return document
+    
+    def __repr__(self):
+        return f'<StoredDocument {self.content_hash[:12]} ({self.size} chars)>'
+
+def encode_result(result):
+    """Compact storage form of an analysis result: minified JSON, zlib-compressed"""
+    return zlib.compress(json.dumps(result, separators=(',', ':')).encode('utf-8'), 6)
+
+def decode_result(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
 class AnalysisHistory(db.Model):
     __tablename__ = 'analysis_history'
+    # Per-user listings walk this index newest-first (keyset pagination on id)
+    __table_args__ = (db.Index('ix_analysis_history_user_id_id', 'user_id', 'id'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -97,10 +241,172 @@ class AnalysisHistory(db.Model):
     company_name = db.Column(db.String(200))
     compatibility_score = db.Column(db.Float, nullable=False)
     compatibility_level = db.Column(db.String(50), nullable=False)
-    resume_text = db.Column(db.Text, nullable=False)
-    job_description = db.Column(db.Text, nullable=False)
-    analysis_result = db.Column(db.JSON, nullable=False)
+    # Texts live in stored_documents, shared by every analysis of the same resume or job description
+    resume_document_id = db.Column(db.Integer, db.ForeignKey('stored_documents.id'), index=True)
+    job_document_id = db.Column(db.Integer, db.ForeignKey('stored_documents.id'), index=True)
+    # Heavy columns are only loaded (together, in one query) when first accessed, so listings stay light
+    analysis_data = db.deferred(db.Column(db.LargeBinary), group='content')
+    # Inline storage from before stored_documents; emptied by migrate_history_storage.py and only read for
+    # rows it has not reached yet
+    legacy_resume_text = db.deferred(db.Column('resume_text', db.Text, default=''), group='content')
+    legacy_job_description = db.deferred(db.Column('job_description', db.Text, default=''), group='content')
+    legacy_analysis_result = db.deferred(db.Column('analysis_result', db.JSON, default=dict), group='content')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    resume_document = db.relationship('StoredDocument', foreign_keys=[resume_document_id])
+    job_document = db.relationship('StoredDocument', foreign_keys=[job_document_id])
+    
+    @property
+    def resume_text(self):
+        document = self.resume_document
+        return document.text if document is not None else self.legacy_resume_text
+    
+    @resume_text.setter
+    def resume_text(self, text):
+        self.resume_document = StoredDocument.store(text)
+    
+    @property
+    def job_description(self):
+        document = self.job_document
+        return document.text if document is not None else self.legacy_job_description
+    
+    @job_description.setter
+    def job_description(self, text):
+        self.job_document = StoredDocument.store(text)
+    
+    @property
+    def analysis_result(self):
+        if self.analysis_data is not None:
+            return decode_result(self.analysis_data)
+        return self.legacy_analysis_result
+    
+    @analysis_result.setter
+    def analysis_result(self, result):
+        self.analysis_data = encode_result(result)
+    
+    @classmethod
+    def with_content(cls):
+        """Loader options fetching texts and result with the row, for pages that show or re-score them"""
+        return (db.undefer_group('content'), db.joinedload(cls.resume_document), db.joinedload(cls.job_document))
+    
+    @classmethod
+    def page_for_user(cls, user_id, before=None, per_page=10):
+        """Newest-first page of a user's analyses with ids below `before`"""
+        query = cls.query.filter(cls.user_id == user_id)
+        if before is not None:
+            query = query.filter(cls.id < before)
+        rows = query.order_by(cls.id.desc()).limit(per_page + 1).all()
+        
+        if len(rows) > per_page:
+            return KeysetPage(rows[:per_page], rows[per_page - 1].id)
+        return KeysetPage(rows)
+    
     def __repr__(self):
         return f'<Analysis {self.id} - {self.compatibility_score}>'
+
+class UserAnalysisStats(db.Model):
+    """Per-user rollup of AnalysisHistory, kept current as analyses are added, rescored or removed"""
+    __tablename__ = 'user_analysis_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_analyses = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Float, default=0.0, nullable=False)
+    last_analysis_at = db.Column(db.DateTime)
+    
+    @property
+    def average_score(self):
+        return self.score_sum / self.total_analyses if self.total_analyses else 0
+    
+    @classmethod
+    def for_user(cls, user_id):
+        """The user's rollup, computed from their history the first time it is needed"""
+        stats = db.session.get(cls, user_id)
+        if stats is not None:
+            return stats
+        
+        # Create the row first, so every analysis committed from here on is counted by the listeners below...
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            db.session.execute(insert(cls.__table__).values(user_id=user_id, total_analyses=0, score_sum=0.0)
+                                .on_conflict_do_nothing(index_elements=['user_id']))
+            db.session.commit()
+        else:
+            db.session.add(cls(user_id=user_id, total_analyses=0, score_sum=0.0))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another request created it first
+                db.session.rollback()
+        
+        # ...then set it from the history. Locking the user waits for transactions still inserting analyses
+        # (their foreign key holds a share lock on it), which found no row to update; SQLite serializes
+        # writers anyway, so the lock is a no-op there.
+        db.session.execute(db.select(User.id).where(User.id == user_id).with_for_update())
+        history = AnalysisHistory.__table__
+        db.session.execute(_stats_table.update().where(_stats_table.c.user_id == user_id).values(
+            total_analyses=db.select(db.func.count(history.c.id))
+                             .where(history.c.user_id == user_id).scalar_subquery(),
+            score_sum=db.select(db.func.coalesce(db.func.sum(history.c.compatibility_score), 0.0))
+                        .where(history.c.user_id == user_id).scalar_subquery(),
+            last_analysis_at=db.select(db.func.max(history.c.created_at))
+                               .where(history.c.user_id == user_id).scalar_subquery()
+        ))
+        db.session.commit()
+        return db.session.get(cls, user_id)
+    
+    def __repr__(self):
+        return f'<UserAnalysisStats {self.user_id}: {self.total_analyses}>'
+
+# Keep the rollup in step with history inside the same transaction. The updates are relative, so concurrent
+# writers never overwrite each other; users without a rollup row yet are backfilled by for_user.
+_stats_table = UserAnalysisStats.__table__
+
+@event.listens_for(AnalysisHistory, 'after_insert')
+def _add_to_stats(mapper, connection, target):
+    connection.execute(_stats_table.update().where(_stats_table.c.user_id == target.user_id).values(
+        total_analyses=_stats_table.c.total_analyses + 1,
+        score_sum=_stats_table.c.score_sum + target.compatibility_score,
+        last_analysis_at=target.created_at
+    ))
+
+@event.listens_for(AnalysisHistory, 'after_update')
+def _rescore_stats(mapper, connection, target):
+    history = inspect(target).attrs.compatibility_score.history
+    if history.deleted and history.added:
+        connection.execute(_stats_table.update().where(_stats_table.c.user_id == target.user_id).values(
+            score_sum=_stats_table.c.score_sum + (history.added[0] - history.deleted[0])
+        ))
+
+@event.listens_for(AnalysisHistory, 'after_delete')
+def _remove_from_stats(mapper, connection, target):
+    connection.execute(_stats_table.update().where(_stats_table.c.user_id == target.user_id).values(
+        total_analyses=_stats_table.c.total_analyses - 1,
+        score_sum=_stats_table.c.score_sum - target.compatibility_score
+    ))
+
+class DocumentFeatures(db.Model):
+    __tablename__ = 'document_features'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    tokens = db.Column(db.JSON, nullable=False)
+    skills = db.Column(db.JSON, nullable=False)
+    skill_hits = db.Column(db.JSON, nullable=False)
+    experience_level = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_features(self):
+        """Features in the form ParsedDocument hydrates from"""
+        return {
+            'tokens': self.tokens,
+            'skills': self.skills,
+            'skill_hits': self.skill_hits,
+            'experience_level': self.experience_level
+        }
+    
+    def __repr__(self):
+        return f'<DocumentFeatures {self.content_hash[:12]}>'
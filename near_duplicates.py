@@ -0,0 +1,175 @@
+"""
+Near-Duplicate Detection
+MinHash signatures with LSH banding to spot job descriptions that were already collected, from any
+source or any earlier run, backed by a persistent SQLite signature index
+"""
+
+import os
+import re
+import zlib
+import time
+import hashlib
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+
+DEFAULT_SIGNATURE_INDEX_PATH = 'instance/job_signatures.db'
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; p is the first prime above 2**32,
+# so a * x + b stays within uint64
+_HASH_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(' '.join(_WORD_PATTERN.findall(text.lower())).encode('utf-8')).hexdigest()
+
+class NearDuplicateIndex:
+    """Finds previously seen texts whose estimated Jaccard similarity is at least `threshold`
+
+    Texts are shingled into word n-grams and reduced to `num_perm` MinHash values. The signature is
+    split into `bands` bands, and texts sharing any band bucket become candidates. Only candidates
+    are compared, so a lookup costs the same however many texts have been indexed.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SIGNATURE_INDEX_PATH, threshold: float = 0.8,
+                 num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+        self.signatures = {}                    # doc id -> signature
+        self.content_hashes = {}                # exact-duplicate fast path: content hash -> doc id
+        self.buckets = defaultdict(list)        # (band, bucket) -> doc ids
+        self.conn = self._open(path) if path else None
+
+    @property
+    def params(self) -> Dict:
+        return {'num_perm': self.num_perm, 'bands': self.bands, 'shingle_size': self.shingle_size, 'seed': self.seed}
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                id INTEGER PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                label TEXT,
+                added_at REAL NOT NULL
+            )
+        """)
+
+        # Signatures are only comparable when made with the same permutations and shingling
+        stored = dict(conn.execute("SELECT key, value FROM meta"))
+        current = {key: str(value) for key, value in self.params.items()}
+        if stored and stored != current:
+            raise ValueError(f"Signature index {path} was built with {stored}, not {current}")
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", current.items())
+        conn.commit()
+
+        for doc_id, content_hash, blob in conn.execute("SELECT id, content_hash, signature FROM signatures"):
+            self._index(doc_id, content_hash, np.frombuffer(blob, dtype=np.uint64))
+        return conn
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        words = _WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: per permutation, the minimum permuted shingle hash"""
+        hashes = self._shingle_hashes(text)
+        permuted = (np.outer(hashes, self.a) + self.b) % _HASH_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[tuple]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _index(self, doc_id: int, content_hash: str, signature: np.ndarray):
+        self.signatures[doc_id] = signature
+        self.content_hashes.setdefault(content_hash, doc_id)
+        for key in self._band_keys(signature):
+            self.buckets[key].append(doc_id)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+        return float(np.mean(first == second))
+
+    def find_duplicate(self, text: str, signature: Optional[np.ndarray] = None) -> Optional[int]:
+        """Id of an indexed text at or above the threshold, or None"""
+        doc_id = self.content_hashes.get(_content_hash(text))
+        if doc_id is not None:
+            return doc_id
+
+        if signature is None:
+            signature = self.signature(text)
+        candidates: Set[int] = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_id, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = self.similarity(signature, self.signatures[candidate])
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate, similarity
+        return best_id
+
+    def add(self, text: str, label: Optional[str] = None, signature: Optional[np.ndarray] = None) -> int:
+        """Index a text unconditionally; returns its id"""
+        if signature is None:
+            signature = self.signature(text)
+        content_hash = _content_hash(text)
+
+        if self.conn is not None:
+            cursor = self.conn.execute(
+                "INSERT INTO signatures (content_hash, signature, label, added_at) VALUES (?, ?, ?, ?)",
+                (content_hash, signature.tobytes(), label, time.time())
+            )
+            self.conn.commit()
+            doc_id = cursor.lastrowid
+        else:
+            doc_id = len(self.signatures) + 1
+        self._index(doc_id, content_hash, signature)
+        return doc_id
+
+    def add_if_new(self, text: str, label: Optional[str] = None) -> bool:
+        """Index the text unless it near-duplicates one already seen; returns whether it was new"""
+        if _content_hash(text) in self.content_hashes:
+            return False
+        signature = self.signature(text)
+        if self.find_duplicate(text, signature) is not None:
+            return False
+        self.add(text, label, signature)
+        return True
+
+    def filter_new(self, jobs: Iterable[Dict], field: str = 'description') -> List[Dict]:
+        """Jobs whose text is not a near-duplicate of anything indexed (including earlier jobs in this call)"""
+        return [job for job in jobs if self.add_if_new(job[field], job.get('title'))]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return len(self.signatures)
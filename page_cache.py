@@ -0,0 +1,220 @@
+"""
+On-Disk Page Cache
+Content-addressed store of fetched pages and their extracted text, keyed by URL, with ETag/Last-Modified
+revalidation, TTL expiry and size-bounded LRU eviction
+"""
+
+import os
+import gzip
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, NamedTuple, Optional
+
+DEFAULT_PAGE_CACHE_PATH = 'instance/page_cache'
+
+class CachedPage(NamedTuple):
+    url: str
+    body_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+class PageCache:
+    """Raw page bodies stored once per content hash under path/bodies, with an SQLite index of
+    URL -> (body hash, validators) and body hash -> extracted text"""
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH, ttl: float = 86400,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.text_hits = 0
+        self.text_misses = 0
+
+        os.makedirs(os.path.join(path, 'bodies'), exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                body_hash TEXT PRIMARY KEY,
+                body_size INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                text TEXT,
+                text_version INTEGER,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_body_hash ON pages (body_hash)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_bodies_accessed ON bodies (accessed_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, 'index.db'), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.path, 'bodies', body_hash[:2], body_hash + '.gz')
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        row = self._connection().execute(
+            "SELECT url, body_hash, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether the page may be served without asking the origin"""
+        return time.time() - page.fetched_at < self.ttl
+
+    def conditional_headers(self, page: CachedPage) -> Dict[str, str]:
+        headers = {}
+        if page.etag:
+            headers['If-None-Match'] = page.etag
+        if page.last_modified:
+            headers['If-Modified-Since'] = page.last_modified
+        return headers
+
+    def read_body(self, page: CachedPage) -> Optional[str]:
+        """The cached body, or None if it has been evicted since the lookup"""
+        try:
+            with gzip.open(self._body_path(page.body_hash), 'rt', encoding='utf-8') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        conn = self._connection()
+        conn.execute("UPDATE bodies SET accessed_at = ? WHERE body_hash = ?", (time.time(), page.body_hash))
+        conn.commit()
+        return body
+
+    def store(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> str:
+        """Record a freshly downloaded page; identical bodies are written once"""
+        body_hash = content_hash(body)
+        body_path = self._body_path(body_hash)
+        if not os.path.exists(body_path):
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            temp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(temp_path, body_path)
+        body_size = os.path.getsize(body_path)
+
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR IGNORE INTO bodies (body_hash, body_size, size, accessed_at) VALUES (?, ?, ?, ?)",
+            (body_hash, body_size, body_size, now)
+        )
+        conn.execute("UPDATE bodies SET accessed_at = ? WHERE body_hash = ?", (now, body_hash))
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (url, body_hash, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, body_hash, etag, last_modified, now)
+        )
+        conn.commit()
+        self._evict()
+        return body_hash
+
+    def revalidated(self, url: str):
+        """The origin answered 304 Not Modified: the cached copy is fresh again"""
+        conn = self._connection()
+        conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        conn.commit()
+
+    def get_text(self, body: str, version: int) -> Optional[str]:
+        """Text previously extracted from this exact body by extractor `version`"""
+        body_hash = content_hash(body)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT text FROM bodies WHERE body_hash = ? AND text_version = ?", (body_hash, version)
+        ).fetchone()
+        with self.lock:
+            if row is None:
+                self.text_misses += 1
+            else:
+                self.text_hits += 1
+        if row is None:
+            return None
+        conn.execute("UPDATE bodies SET accessed_at = ? WHERE body_hash = ?", (time.time(), body_hash))
+        conn.commit()
+        return row[0]
+
+    def set_text(self, body: str, text: str, version: int):
+        """Remember extracted text for a stored body (no-op if the body is not cached)"""
+        conn = self._connection()
+        conn.execute(
+            "UPDATE bodies SET text = ?, text_version = ?, size = body_size + ? WHERE body_hash = ?",
+            (text, version, len(text.encode('utf-8')), content_hash(body))
+        )
+        conn.commit()
+
+    def _evict(self):
+        """Drop bodies no page points to any more, then least recently used ones until under max_bytes"""
+        conn = self._connection()
+        orphans = [row[0] for row in conn.execute(
+            "SELECT body_hash FROM bodies WHERE body_hash NOT IN (SELECT body_hash FROM pages)"
+        )]
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+        victims = []
+        if total > self.max_bytes:
+            for body_hash, size in conn.execute(
+                "SELECT body_hash, size FROM bodies ORDER BY accessed_at"
+            ):
+                if total <= self.max_bytes:
+                    break
+                victims.append(body_hash)
+                total -= size
+
+        removed = orphans + victims
+        if not removed:
+            return
+        conn.executemany("DELETE FROM pages WHERE body_hash = ?", [(h,) for h in victims])
+        conn.executemany("DELETE FROM bodies WHERE body_hash = ?", [(h,) for h in removed])
+        conn.commit()
+        for body_hash in removed:
+            try:
+                os.remove(self._body_path(body_hash))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        conn = self._connection()
+        hashes = [row[0] for row in conn.execute("SELECT body_hash FROM bodies")]
+        conn.execute("DELETE FROM pages")
+        conn.execute("DELETE FROM bodies")
+        conn.commit()
+        for body_hash in hashes:
+            try:
+                os.remove(self._body_path(body_hash))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        bodies, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bodies").fetchone()
+        return {
+            'pages': pages,
+            'bodies': bodies,
+            'bytes': size,
+            'text_hits': self.text_hits,
+            'text_misses': self.text_misses
+        }
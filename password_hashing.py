@@ -0,0 +1,88 @@
+"""
+Password Hashing
+Pluggable password hasher (werkzeug pbkdf2 or scrypt, or bcrypt) with a configurable cost, able to tell
+when a stored hash was made with other settings so it can be upgraded on the next successful login
+"""
+
+from typing import Optional, Tuple
+import bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Cost per scheme: pbkdf2 iterations, scrypt N (a power of two), bcrypt log2 rounds
+DEFAULT_COSTS = {
+    'pbkdf2': 600000,
+    'scrypt': 32768,
+    'bcrypt': 12
+}
+
+# bcrypt only uses the first 72 bytes of a password (and bcrypt>=5 refuses longer input)
+BCRYPT_MAX_BYTES = 72
+
+# Fixed parts of the werkzeug methods new hashes are made with
+PBKDF2_DIGEST = 'sha256'
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+
+def parse_hash(password_hash: str) -> Tuple[Optional[str], Tuple]:
+    """(scheme, parameters) a stored hash was made with; (None, ()) if it is not recognised
+
+    Parameters are (rounds,) for bcrypt, (digest, iterations) for pbkdf2 and (N, r, p) for scrypt.
+    """
+    if password_hash.startswith('$2'):
+        # $2b$<rounds>$<salt and hash>
+        parts = password_hash.split('$')
+        return ('bcrypt', (int(parts[2]),)) if len(parts) == 4 and parts[2].isdigit() else (None, ())
+
+    # werkzeug: <method>$<salt>$<hash>, method "pbkdf2:<digest>:<iterations>" or "scrypt:<n>:<r>:<p>"
+    method = password_hash.split('$', 1)[0].split(':')
+    if method[0] == 'pbkdf2' and len(method) == 3 and method[2].isdigit():
+        return 'pbkdf2', (method[1], int(method[2]))
+    if method[0] == 'scrypt' and len(method) == 4 and all(part.isdigit() for part in method[1:]):
+        return 'scrypt', tuple(int(part) for part in method[1:])
+    return None, ()
+
+class PasswordHasher:
+    """Hashes new passwords with the configured scheme and verifies hashes made with any supported one"""
+
+    def __init__(self, scheme: str = 'scrypt', cost: Optional[int] = None):
+        self.configure(scheme, cost)
+
+    def init_app(self, app):
+        self.configure(app.config.get('PASSWORD_HASH_SCHEME', 'scrypt'), app.config.get('PASSWORD_HASH_COST'))
+
+    def configure(self, scheme: str, cost: Optional[int] = None):
+        if scheme not in DEFAULT_COSTS:
+            raise ValueError(f"Unknown password hash scheme {scheme!r}; use one of {', '.join(DEFAULT_COSTS)}")
+        if scheme == 'scrypt' and cost is not None and cost & (cost - 1):
+            raise ValueError(f"scrypt cost must be a power of two, not {cost}")
+        self.scheme = scheme
+        self.cost = cost or DEFAULT_COSTS[scheme]
+
+    @property
+    def parameters(self) -> Tuple:
+        """What parse_hash returns as parameters for a hash made with the current settings"""
+        if self.scheme == 'bcrypt':
+            return (self.cost,)
+        if self.scheme == 'pbkdf2':
+            return (PBKDF2_DIGEST, self.cost)
+        return (self.cost, SCRYPT_BLOCK_SIZE, SCRYPT_PARALLELISM)
+
+    def hash(self, password: str) -> str:
+        if self.scheme == 'bcrypt':
+            return bcrypt.hashpw(password.encode('utf-8')[:BCRYPT_MAX_BYTES], bcrypt.gensalt(self.cost)).decode('ascii')
+        return generate_password_hash(password, method=':'.join(map(str, (self.scheme, *self.parameters))))
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        if password_hash.startswith('$2'):
+            try:
+                return bcrypt.checkpw(password.encode('utf-8')[:BCRYPT_MAX_BYTES], password_hash.encode('ascii'))
+            except ValueError:
+                return False
+        return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether the hash was made with a different scheme, cost or other parameter than the current settings"""
+        return parse_hash(password_hash) != (self.scheme, self.parameters)
+
+# Shared instance; configured from PASSWORD_HASH_SCHEME / PASSWORD_HASH_COST by init_app
+password_hasher = PasswordHasher()
@@ -0,0 +1,141 @@
+"""
+Process-Pool Scoring Backend
+Fans ResumeAnalyzer work out to worker processes so batch and bulk scoring use every core
+"""
+
+import os
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from ml_engine import ResumeAnalyzer, MODEL_METADATA_FILE
+
+# Set in each worker process by _init_worker
+_worker_analyzer = None
+
+def _init_worker(model_path: Optional[str]):
+    """Load the model once per worker process"""
+    global _worker_analyzer
+    if model_path:
+        _worker_analyzer = ResumeAnalyzer.load(model_path)
+    else:
+        _worker_analyzer = ResumeAnalyzer()
+
+def _score_pairs(pairs: List[Tuple[str, str]]) -> List[Dict]:
+    results = []
+    for resume, job_description in pairs:
+        try:
+            results.append(_worker_analyzer.analyze_compatibility(resume, job_description))
+        except Exception as e:
+            # One bad pair must not sink the rest of a bulk run
+            results.append({'error': str(e)})
+    return results
+
+def _rank_chunk(resumes, job_descriptions, top_k: Optional[int]) -> List[Dict]:
+    # Reports keep their unrounded "_score" so chunks merge in exactly the in-process order
+    return _worker_analyzer._rank_many(resumes, job_descriptions, top_k=top_k)
+
+def _chunks(items: Sequence, size: int) -> List[Sequence]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+class ScoringPool:
+    """Process pool running ResumeAnalyzer in every worker, with results in submission order"""
+
+    def __init__(self, model_path: Optional[str] = None, processes: Optional[int] = None, chunk_size: int = 64):
+        self.model_path = model_path
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # spawn keeps children free of the parent's threads and open connections;
+        # with a model artifact they just memory-map it rather than retraining
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_path,)
+        )
+
+    def analyze_pairs(self, pairs: Sequence[Tuple[str, str]]) -> List[Dict]:
+        """Analyze (resume, job description) pairs; failed pairs come back as {'error': ...}"""
+        results = []
+        for chunk_results in self.executor.map(_score_pairs, _chunks(list(pairs), self.chunk_size)):
+            results.extend(chunk_results)
+        return results
+
+    def analyze_many(self, resumes, job_descriptions, top_k: Optional[int] = None) -> List[Dict]:
+        """Same contract as ResumeAnalyzer.analyze_many, with the list side split across processes"""
+        if isinstance(resumes, str) == isinstance(job_descriptions, str):
+            raise Exception("Batch analysis failed: Provide one resume with many job descriptions, "
+                            "or many resumes with one job description")
+
+        many = job_descriptions if isinstance(resumes, str) else resumes
+        chunks = _chunks(list(many), self.chunk_size)
+        futures = [
+            self.executor.submit(_rank_chunk, resumes, chunk, top_k) if isinstance(resumes, str)
+            else self.executor.submit(_rank_chunk, chunk, job_descriptions, top_k)
+            for chunk in chunks
+        ]
+
+        # Each chunk already holds its own top-k, so the global top-k is among them
+        results = []
+        for offset, future in zip(range(0, len(many), self.chunk_size), futures):
+            for report in future.result():
+                report['index'] += offset
+                results.append(report)
+
+        # Same order as ResumeAnalyzer.analyze_many's stable argsort: exact score, then input index
+        results.sort(key=lambda report: (-report['_score'], report['index']))
+        if top_k is not None:
+            results = results[:top_k]
+        for rank, report in enumerate(results, start=1):
+            del report['_score']
+            report['rank'] = rank
+        return results
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def rescore_history(model_path: Optional[str], processes: Optional[int], batch_size: int = 1000):
+    """Re-score every saved analysis with the current model"""
+    from main import app
+    from models import db, AnalysisHistory
+
+    with app.app_context(), ScoringPool(model_path, processes) as pool:
+        last_id = 0
+        updated = 0
+        while True:
+            rows = AnalysisHistory.query.options(*AnalysisHistory.with_content())\
+                                        .filter(AnalysisHistory.id > last_id)\
+                                        .order_by(AnalysisHistory.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            results = pool.analyze_pairs([(row.resume_text, row.job_description) for row in rows])
+            for row, result in zip(rows, results):
+                if 'error' in result:
+                    continue
+                row.compatibility_score = result['compatibility_score']
+                row.compatibility_level = result['compatibility_level']
+                row.analysis_result = result
+                updated += 1
+
+            db.session.commit()
+            last_id = rows[-1].id
+            print(f"Re-scored {updated} analyses so far...")
+
+    print(f"Re-scored {updated} analyses")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score saved analyses on all cores")
+    parser.add_argument('--model', default=os.environ.get('MODEL_PATH', 'instance/model'),
+                        help="model artifact directory (default: $MODEL_PATH or instance/model)")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    model_path = args.model if os.path.exists(os.path.join(args.model, MODEL_METADATA_FILE)) else None
+    rescore_history(model_path, args.processes)
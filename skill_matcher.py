@@ -0,0 +1,240 @@
+"""
+Shared Skill Matcher
+Compiled trie over every known skill phrase, matched in a single pass over the text
+"""
+
+import re
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterable, List
+import numpy as np
+
+# Skill catalog used for per-category scoring in ResumeAnalyzer
+SKILL_CATEGORIES = {
+    'programming': ['python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'rust', 'swift', 'kotlin', 'scala', 'r', 'php', 'ruby', 'objective-c', 'solidity'],
+    'frameworks': ['django', 'flask', 'fastapi', 'react', 'angular', 'vue', 'nextjs', 'nuxt', 'spring', 'spring boot', 'express', 'nestjs', 'laravel', 'rails', 'dotnet', 'asp.net', 'unity', 'react native', 'flutter'],
+    'cloud': ['aws', 'azure', 'gcp', 'lambda', 'ec2', 's3', 'rds', 'eks', 'ecs', 'cloudformation', 'terraform', 'serverless', 'firebase', 'heroku', 'digitalocean'],
+    'devops': ['docker', 'kubernetes', 'jenkins', 'gitlab', 'github actions', 'ansible', 'terraform', 'helm', 'argocd', 'prometheus', 'grafana', 'elk', 'ci/cd', 'gitops'],
+    'databases': ['mysql', 'postgresql', 'mongodb', 'redis', 'sqlite', 'oracle', 'sql server', 'dynamodb', 'cassandra', 'elasticsearch', 'snowflake', 'bigquery', 'redshift'],
+    'frontend': ['html', 'css', 'javascript', 'typescript', 'react', 'vue', 'angular', 'sass', 'less', 'webpack', 'vite', 'bootstrap', 'tailwind', 'material-ui', 'styled-components'],
+    'mobile': ['swift', 'kotlin', 'java', 'react native', 'flutter', 'xamarin', 'ionic', 'objective-c', 'android', 'ios', 'xcode', 'android studio'],
+    'data_science': ['pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras', 'jupyter', 'matplotlib', 'seaborn', 'plotly', 'tableau', 'power bi', 'r', 'stata', 'spss'],
+    'big_data': ['apache spark', 'hadoop', 'kafka', 'airflow', 'dbt', 'databricks', 'snowflake', 'redshift', 'bigquery', 'hive', 'pig', 'storm', 'flink'],
+    'testing': ['junit', 'pytest', 'jest', 'cypress', 'selenium', 'testng', 'mocha', 'chai', 'enzyme', 'react testing library', 'espresso', 'xctest'],
+    'monitoring': ['prometheus', 'grafana', 'datadog', 'new relic', 'splunk', 'elk stack', 'jaeger', 'zipkin', 'pagerduty', 'sentry'],
+    'security': ['owasp', 'penetration testing', 'vulnerability assessment', 'encryption', 'oauth', 'jwt', 'ssl/tls', 'firewall', 'iam', 'security audit'],
+    'version_control': ['git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'perforce'],
+    'apis': ['rest', 'graphql', 'grpc', 'soap', 'api gateway', 'swagger', 'postman', 'insomnia', 'openapi'],
+    'methodologies': ['agile', 'scrum', 'kanban', 'lean', 'devops', 'tdd', 'bdd', 'ci/cd', 'microservices', 'mvp', 'design patterns']
+}
+
+# Massively expanded skill list used by TechJobDataCollector, covering all major tech domains
+TECH_SKILLS = {
+    # Programming Languages
+    'python', 'java', 'javascript', 'typescript', 'go', 'rust', 'c++', 'c#', 'c', 
+    'swift', 'kotlin', 'scala', 'ruby', 'php', 'perl', 'r', 'matlab', 'objective-c',
+    'dart', 'solidity', 'elixir', 'erlang', 'haskell', 'clojure', 'f#', 'vb.net',
+
+    # Web Frameworks
+    'react', 'vue', 'angular', 'django', 'flask', 'fastapi', 'spring', 'spring boot',
+    'express', 'nestjs', 'next.js', 'nuxt', 'gatsby', 'svelte', 'ember', 'backbone',
+    'laravel', 'symfony', 'codeigniter', 'rails', 'sinatra', 'asp.net', 'blazor',
+
+    # Mobile Development
+    'react native', 'flutter', 'xamarin', 'ionic', 'cordova', 'phonegap', 'unity',
+    'cocos2d', 'unreal engine', 'android studio', 'xcode', 'swiftui', 'jetpack compose',
+
+    # Cloud Platforms
+    'aws', 'azure', 'gcp', 'alibaba cloud', 'oracle cloud', 'digitalocean', 'heroku',
+    'vercel', 'netlify', 'firebase', 'supabase', 'cloudflare', 'linode', 'vultr',
+
+    # AWS Services
+    'ec2', 's3', 'lambda', 'rds', 'dynamodb', 'cloudfront', 'route53', 'vpc',
+    'iam', 'cloudformation', 'cloudwatch', 'sns', 'sqs', 'kinesis', 'redshift',
+    'eks', 'ecs', 'fargate', 'api gateway', 'cognito', 'secrets manager',
+
+    # Azure Services
+    'azure functions', 'azure sql', 'cosmos db', 'azure storage', 'azure ad',
+    'azure devops', 'azure kubernetes service', 'azure container instances',
+
+    # DevOps & Infrastructure
+    'docker', 'kubernetes', 'terraform', 'ansible', 'puppet', 'chef', 'vagrant',
+    'helm', 'istio', 'envoy', 'consul', 'vault', 'nomad', 'packer', 'jenkins',
+    'gitlab ci', 'github actions', 'circleci', 'travis ci', 'bamboo', 'teamcity',
+    'argocd', 'flux', 'tekton', 'spinnaker',
+
+    # Databases
+    'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch', 'sqlite', 'oracle',
+    'sql server', 'mariadb', 'cassandra', 'neo4j', 'influxdb', 'clickhouse',
+    'dynamodb', 'firestore', 'couchdb', 'rethinkdb', 'arangodb', 'snowflake',
+    'bigquery', 'redshift', 'databricks', 'cockroachdb', 'planetscale',
+
+    # Data Science & ML
+    'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 'numpy', 'scipy',
+    'matplotlib', 'seaborn', 'plotly', 'jupyter', 'anaconda', 'mlflow', 'kubeflow',
+    'airflow', 'prefect', 'dask', 'ray', 'spark', 'hadoop', 'hive', 'pig',
+    'kafka', 'pulsar', 'storm', 'flink', 'beam', 'nifi',
+
+    # Frontend Technologies
+    'html', 'css', 'sass', 'less', 'stylus', 'bootstrap', 'tailwind', 'bulma',
+    'material-ui', 'ant design', 'chakra ui', 'semantic ui', 'foundation',
+    'webpack', 'vite', 'rollup', 'parcel', 'gulp', 'grunt', 'babel', 'eslint',
+    'prettier', 'styled-components', 'emotion', 'redux', 'mobx', 'zustand',
+
+    # Testing Frameworks
+    'jest', 'mocha', 'chai', 'jasmine', 'karma', 'protractor', 'cypress', 'playwright',
+    'selenium', 'webdriver', 'puppeteer', 'junit', 'testng', 'mockito', 'pytest',
+    'unittest', 'nose', 'tox', 'coverage', 'codecov', 'sonarqube',
+
+    # Monitoring & Observability
+    'prometheus', 'grafana', 'datadog', 'new relic', 'dynatrace', 'splunk',
+    'elk stack', 'logstash', 'kibana', 'fluentd', 'jaeger', 'zipkin', 'opentelemetry',
+    'sentry', 'rollbar', 'bugsnag', 'pagerduty', 'opsgenie', 'pingdom',
+
+    # Security Tools
+    'owasp', 'nessus', 'burp suite', 'metasploit', 'nmap', 'wireshark', 'snort',
+    'ossec', 'fail2ban', 'iptables', 'firewalld', 'selinux', 'apparmor',
+
+    # API Technologies
+    'rest', 'graphql', 'grpc', 'soap', 'websockets', 'webhooks', 'openapi',
+    'swagger', 'postman', 'insomnia', 'apollo', 'relay', 'hasura', 'prisma',
+
+    # Version Control
+    'git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'perforce',
+    'git flow', 'github flow', 'trunk-based development',
+
+    # Operating Systems
+    'linux', 'ubuntu', 'centos', 'rhel', 'debian', 'alpine', 'windows', 'macos',
+    'unix', 'bash', 'zsh', 'powershell', 'cmd', 'shell scripting',
+
+    # Methodologies
+    'agile', 'scrum', 'kanban', 'lean', 'devops', 'tdd', 'bdd', 'ddd', 'microservices',
+    'monolith', 'event-driven', 'cqrs', 'event sourcing', 'clean architecture',
+    'hexagonal architecture', 'mvc', 'mvp', 'mvvm', 'solid principles',
+
+    # Blockchain & Crypto
+    'blockchain', 'bitcoin', 'ethereum', 'smart contracts', 'defi', 'nft',
+    'web3', 'metamask', 'truffle', 'hardhat', 'ganache', 'ipfs',
+
+    # Game Development
+    'unity', 'unreal engine', 'godot', 'cocos2d', 'phaser', 'three.js', 'webgl',
+    'opengl', 'directx', 'vulkan', 'metal', 'hlsl', 'glsl',
+
+    # IoT & Embedded
+    'arduino', 'raspberry pi', 'esp32', 'mqtt', 'coap', 'zigbee', 'bluetooth',
+    'wifi', 'lora', 'sigfox', 'nb-iot', 'rtos', 'freertos', 'zephyr',
+
+    # Analytics & BI
+    'tableau', 'power bi', 'looker', 'qlik', 'spotfire', 'superset', 'metabase',
+    'google analytics', 'adobe analytics', 'mixpanel', 'amplitude', 'segment'
+}
+
+SkillMatch = namedtuple('SkillMatch', ['skill', 'start', 'end', 'categories'])
+
+# Skills may only begin where a word begins (e.g. "java" must not match inside "javascript")
+_WORD_START = re.compile(r'\b\w')
+_TERMINAL = None
+
+# One- and two-letter skills ('go', 'r', 'c') are ordinary English ("ready to go", "r&d") far more often
+# than languages, so by default they are left out, as the analyzer's token-based matching always did
+SHORT_SKILL_LENGTH = 2
+# ...and even where they are wanted, not as the start of "r&d", "c&c", "c++" or "c#"
+_SHORT_SKILL_STOPS = '&+#'
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+class SkillMatcher:
+    """Character trie over skill phrases, including multi-word and punctuated ones like 'spring boot' or 'c++'"""
+    
+    def __init__(self, skill_categories: Dict[str, List[str]], extra_skills: Iterable[str] = ()):
+        self.trie = {}
+        self.short_skills = set()
+        # skill -> [(category, position within category)], in catalog order
+        self.categories = defaultdict(list)
+        self.category_order = {category: index for index, category in enumerate(skill_categories)}
+        
+        for category, skills in skill_categories.items():
+            for position, skill in enumerate(skills):
+                self.categories[skill.lower()].append((category, position))
+                self._insert(skill.lower())
+        
+        for skill in extra_skills:
+            self._insert(skill.lower())
+        
+        self.category_names = {skill: tuple(category for category, _ in entries)
+                               for skill, entries in self.categories.items()}
+        
+        # Fixed-width encoding of categorized skills: one slot per distinct (category, skill) pair, and a
+        # slot x category indicator matrix so per-category counts are a single matrix product
+        self.category_list = list(skill_categories)
+        self.skill_slots = defaultdict(list)
+        slot_categories = []
+        for category in self.category_list:
+            for skill in dict.fromkeys(skill.lower() for skill in skill_categories[category]):
+                self.skill_slots[skill].append(len(slot_categories))
+                slot_categories.append(self.category_order[category])
+        self.category_matrix = np.zeros((len(slot_categories), len(self.category_list)), dtype=np.int32)
+        self.category_matrix[np.arange(len(slot_categories)), slot_categories] = 1
+    
+    def _insert(self, skill: str):
+        node = self.trie
+        for ch in skill:
+            node = node.setdefault(ch, {})
+        node[_TERMINAL] = skill
+        if len(skill) <= SHORT_SKILL_LENGTH and skill.isalpha():
+            self.short_skills.add(skill)
+    
+    def find(self, text: str, include_short: bool = False) -> List[SkillMatch]:
+        """Return every skill occurrence in already-lowercased text with its character offsets
+        
+        Short alphabetic skills (see SHORT_SKILL_LENGTH) are only matched with include_short.
+        """
+        short_skills = self.short_skills
+        matches = []
+        trie = self.trie
+        length = len(text)
+        
+        for word_start in _WORD_START.finditer(text):
+            node = trie
+            position = word_start.start()
+            while position < length:
+                node = node.get(text[position])
+                if node is None:
+                    break
+                position += 1
+                skill = node.get(_TERMINAL)
+                # The match must end on a word boundary as well
+                if skill is None or (position < length and _is_word_char(text[position])):
+                    continue
+                if skill in short_skills and (not include_short or (position < length and text[position] in _SHORT_SKILL_STOPS)):
+                    continue
+                matches.append(SkillMatch(skill, word_start.start(), position,
+                                          self.category_names.get(skill, ())))
+        
+        return matches
+    
+    def skills(self, matches: List[SkillMatch]) -> List[str]:
+        """Distinct matched skills in order of first occurrence"""
+        return list(dict.fromkeys(match.skill for match in matches))
+    
+    def slot_vector(self, skills: Iterable[str]) -> np.ndarray:
+        """Boolean vector over the catalog's (category, skill) slots for the given skills"""
+        vector = np.zeros(len(self.category_matrix), dtype=bool)
+        for skill in skills:
+            vector[self.skill_slots.get(skill, [])] = True
+        return vector
+    
+    def categorize(self, matches: List[SkillMatch]) -> Dict[str, List[str]]:
+        """Group matched skills by category, ordered as in the skill catalog"""
+        hits = defaultdict(list)
+        for skill in self.skills(matches):
+            for category, position in self.categories.get(skill, ()):
+                hits[category].append((position, skill))
+        
+        return {
+            category: [skill for _, skill in sorted(hits[category])]
+            for category in sorted(hits, key=self.category_order.get)
+        }
+
+# Built once at import and shared by the analyzer request path and the data collector
+SKILL_MATCHER = SkillMatcher(SKILL_CATEGORIES, TECH_SKILLS)
@@ -0,0 +1,49 @@
+import pytest
+
+from experience_extractor import POSTING_EXPERIENCE_EXTRACTOR
+
+def old_collector_level(text):
+    """TechJobDataCollector._extract_experience_level before it moved to experience_extractor"""
+    text_lower = text.lower()
+
+    if any(term in text_lower for term in ['senior', 'lead', 'principal', 'staff', '5+ years', '6+ years', '7+ years', '8+ years']):
+        return 'senior'
+    elif any(term in text_lower for term in ['junior', 'entry level', 'graduate', '0-2 years', '1-3 years']):
+        return 'junior'
+    else:
+        return 'mid'
+
+@pytest.mark.parametrize('text', [
+    "Requirements: 5+ years of backend development",
+    "7+ years building distributed systems",
+    "6+ years experience with Kubernetes",
+    "8+ years in software engineering",
+    "0-2 years experience with python",
+    "1-3 years experience required",
+    "Python developer. Great team culture and benefits.",
+    "Senior Backend Engineer",
+    "Tech Lead, Payments",
+    "Principal Engineer, Platform",
+    "Staff Software Engineer",
+    "Junior Frontend Developer",
+    "Entry level data analyst",
+    "Graduate software engineer programme",
+    "Mid-level React developer",
+    "3 years of experience with Django",
+])
+def test_posting_levels_match_old_collector(text):
+    assert POSTING_EXPERIENCE_EXTRACTOR.level(text.lower()) == old_collector_level(text)
+
+@pytest.mark.parametrize('text, level', [
+    ("We partner with a staffing agency", 'mid'),
+    ("Experience with principal component analysis", 'mid'),
+    ("Principal components of the role", 'mid'),
+])
+def test_posting_level_words_match_whole_words_only(text, level):
+    assert POSTING_EXPERIENCE_EXTRACTOR.level(text.lower()) == level
+
+def test_posting_years_read_minimum_requirement():
+    assert POSTING_EXPERIENCE_EXTRACTOR.years("5+ years of backend development") == 5
+    assert POSTING_EXPERIENCE_EXTRACTOR.years("0-2 years experience with python") == 0
+    assert POSTING_EXPERIENCE_EXTRACTOR.years("3 to 5 years building apis") == 3
+    assert POSTING_EXPERIENCE_EXTRACTOR.years("great team culture") is None
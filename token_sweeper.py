@@ -0,0 +1,63 @@
+"""
+Token Sweeper
+Background thread that deletes used and expired email verification and password reset tokens in batches,
+so the token tables stay small
+"""
+
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, Optional
+from models import db, EmailVerification, PasswordReset
+
+TOKEN_MODELS = (EmailVerification, PasswordReset)
+
+def sweep_tokens(batch_size: int = 1000) -> Dict[str, int]:
+    """Delete used and expired tokens from every token table; returns how many were removed per table"""
+    return {model.__tablename__: model.sweep(batch_size) for model in TOKEN_MODELS}
+
+class TokenSweeper:
+    """Runs sweep_tokens every `interval` seconds"""
+
+    def __init__(self, app, interval: float = 3600, batch_size: int = 1000):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="token-sweeper", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            with self.app.app_context():
+                try:
+                    removed = sweep_tokens(self.batch_size)
+                    if any(removed.values()):
+                        logging.info(f"Swept tokens: {removed}")
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Token sweep failed: {e}")
+                finally:
+                    db.session.remove()
+            self.stopping.wait(self.interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete used and expired verification and reset tokens once")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    from main import app
+
+    started = time.perf_counter()
+    with app.app_context():
+        removed = sweep_tokens(args.batch_size)
+    print(f"Removed {removed} in {time.perf_counter() - started:.1f}s")
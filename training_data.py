@@ -0,0 +1,72 @@
+"""
+Streaming Training Data
+Line-delimited JSON training corpus ([resume, job_description, compatibility] per line, optionally
+gzip-compressed) read as a generator so memory does not grow with corpus size
+"""
+
+import os
+import gzip
+import json
+import argparse
+from typing import Iterable, Iterator, Tuple
+
+DEFAULT_TRAINING_DATA_PATH = 'data/training_data.jsonl.gz'
+COLLECTED_TRAINING_DATA_PATH = 'data/collected_training_data.jsonl.gz'
+
+Example = Tuple[str, str, str]
+
+def _open(path: str, mode: str, compressed: bool):
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def iter_training_data(path: str) -> Iterator[Example]:
+    """Yield (resume, job_description, compatibility) examples one line at a time"""
+    with _open(path, 'r', path.endswith('.gz')) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                resume, job_description, compatibility = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: malformed training example: {e}")
+            yield resume, job_description, compatibility
+
+class TrainingDataStream:
+    """Re-iterable view over a training data file; each iteration re-reads it from disk"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Example]:
+        return iter_training_data(self.path)
+
+def write_training_data(path: str, examples: Iterable[Example], append: bool = False) -> int:
+    """Stream examples to path; returns the number written. Replaces the file atomically unless appending."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    target = path if append else path + '.tmp'
+    count = 0
+    # gzip members can be concatenated, so appending to a .gz file stays valid
+    with _open(target, 'a' if append else 'w', path.endswith('.gz')) as f:
+        for resume, job_description, compatibility in examples:
+            f.write(json.dumps([resume, job_description, compatibility], ensure_ascii=False))
+            f.write('\n')
+            count += 1
+
+    if not append:
+        os.replace(target, path)
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the bundled Python training module to the streaming format")
+    parser.add_argument('--output', default=DEFAULT_TRAINING_DATA_PATH,
+                        help=f"destination file (default: {DEFAULT_TRAINING_DATA_PATH})")
+    args = parser.parse_args()
+
+    from data.real_training_data import REAL_TRAINING_DATA
+    written = write_training_data(args.output, REAL_TRAINING_DATA)
+    print(f"Wrote {written} training examples to {args.output}")
@@ -0,0 +1,124 @@
+"""
+User Cache
+Short-TTL cache of users' column values for flask-login's user_loader, so rebuilding current_user on each
+request does not cost a primary-key query; entries are dropped whenever a user row changes
+"""
+
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached, object_session
+from analysis_cache import MemoryCacheBackend, SQLiteCacheBackend
+from models import db, User
+
+# Left out of the cache (and lazily loaded if ever needed): nothing reads it from current_user
+_EXCLUDED_COLUMNS = {'password_hash'}
+_COLUMNS = [column for column in User.__table__.columns if column.key not in _EXCLUDED_COLUMNS]
+_DATETIME_COLUMNS = {column.key for column in _COLUMNS if isinstance(column.type, db.DateTime)}
+
+class UserCache:
+    """Users by id in a memory or local SQLite backend; load() falls back to the database on a miss"""
+
+    def __init__(self, backend=None, ttl: float = 10):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = app.config.get('USER_CACHE_BACKEND', 'sqlite')
+        if backend == 'none':
+            self.backend = None
+        elif backend == 'memory':
+            self.backend = MemoryCacheBackend(app.config.get('USER_CACHE_SIZE', 4096))
+        elif backend == 'sqlite':
+            self.backend = SQLiteCacheBackend(app.config.get('USER_CACHE_PATH', 'instance/user_cache.db'),
+                                              app.config.get('USER_CACHE_SIZE', 4096))
+        else:
+            raise ValueError(f"Unknown user cache backend: {backend}")
+        self.ttl = app.config.get('USER_CACHE_TTL', 10)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def load(self, user_id: int) -> Optional[User]:
+        """The user, attached to the current session, without a query when cached"""
+        if self.backend is None:
+            return db.session.get(User, user_id)
+
+        value = self.backend.get(self._key(user_id))
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is not None:
+            return self._attach(json.loads(value))
+
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.backend.set(self._key(user_id), json.dumps(self._dump(user)), self.ttl)
+        return user
+
+    def invalidate(self, user_id: int):
+        if self.backend is not None:
+            self.backend.delete(self._key(user_id))
+
+    @staticmethod
+    def _dump(user: User) -> Dict:
+        values = {}
+        for column in _COLUMNS:
+            value = getattr(user, column.key)
+            values[column.key] = value.isoformat() if isinstance(value, datetime) else value
+        return values
+
+    @staticmethod
+    def _attach(values: Dict) -> User:
+        for key in _DATETIME_COLUMNS:
+            if values[key] is not None:
+                values[key] = datetime.fromisoformat(values[key])
+        # Rebuilt as if loaded from the database, then merged without a SELECT; relationships and the
+        # excluded columns still load lazily on first access
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared instance; configured from USER_CACHE_BACKEND / USER_CACHE_TTL by init_app
+user_cache = UserCache()
+
+# Any committed change to a user row (profile, password, verification, last login) or its deletion drops
+# the cached copy. Invalidating after the commit, rather than at flush, keeps a concurrent request from
+# re-caching the old row before the change is visible.
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _remember_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_users', set()).add(target.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_changed_users(session):
+    # Savepoints (e.g. the feature store's writes) fire these events too; wait for the outer transaction
+    if session.in_nested_transaction():
+        return
+    for user_id in session.info.pop('changed_users', ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_changed_users(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop('changed_users', None)